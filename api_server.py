@@ -250,7 +250,7 @@ async def attach_video(event_id: str, video_data: VideoAttach):
 @app.get('/api/dependencies')
 async def check_dependencies():
     """Check all dependencies"""
-    results = dependency_manager.check_all()
+    results = dependency_manager.check_all(with_version=True)
     
     # Add Ollama model check
     ollama_installed = results.get('ollama', {}).get('installed', False)
@@ -342,7 +342,7 @@ async def configure_custom_path(dep_key: str, path_data: dict):
 @app.get('/api/dependencies/{dep_key}')
 async def check_dependency(dep_key: str):
     """Check specific dependency"""
-    is_installed, version = dependency_manager.check_dependency(dep_key)
+    is_installed, version = dependency_manager.check_dependency(dep_key, with_version=True)
     
     dep_info = dependency_manager.DEPENDENCIES.get(dep_key)
     if not dep_info:
@@ -745,7 +745,8 @@ async def check_comfyui_status(server_url: str = "http://127.0.0.1:8188"):
         from modules.thumbnail.ai_generator_comfyui import ComfyUIGenerator
         
         generator = ComfyUIGenerator(server_url=server_url)
-        is_available = generator.check_server()
+        is_available = generator.check_server(deep=True)
+        generator.close()
         
         return {
             'available': is_available,
@@ -776,6 +777,7 @@ async def generate_with_comfyui(request: ComfyUIGenerateRequest):
         
         # Check server first
         if not generator.check_server():
+            generator.close()
             raise HTTPException(
                 status_code=503, 
                 detail=f"ComfyUI server not available at {server_url}"
@@ -795,6 +797,7 @@ async def generate_with_comfyui(request: ComfyUIGenerateRequest):
             steps=request.steps,
             seed=request.seed
         )
+        generator.close()
         
         if success:
             return {
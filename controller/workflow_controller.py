@@ -418,11 +418,15 @@ class WorkflowController:
                 width = event_config.get("comfyui_width", 1280)
                 height = event_config.get("comfyui_height", 720)
                 steps = event_config.get("comfyui_steps", 8)
+                comfyui_output_dir = event_config.get("comfyui_output_dir")
                 
                 self.logger.info(f"AI generation settings: backend=comfyui, server={server_url}, size={width}x{height}, steps={steps}")
                 
                 # Initialize ComfyUI generator
-                generator = ComfyUIGenerator(server_url=server_url)
+                generator = ComfyUIGenerator(
+                    server_url=server_url,
+                    comfyui_output_dir=comfyui_output_dir
+                )
                 
                 # Generate image (returns tuple: success, error_message)
                 success, error = generator.generate(
@@ -440,11 +444,20 @@ class WorkflowController:
                 
                 self.logger.info(f"AI generation settings: backend={backend}, model={model}, unload_after={unload_model_after}")
                 
+                # Optional cache of earlier backgrounds, reused for similar prompts
+                prompt_cache = None
+                prompt_cache_path = event_config.get("thumbnail_prompt_cache")
+                if prompt_cache_path:
+                    from modules.thumbnail.prompt_cache import PromptCache
+                    prompt_cache = PromptCache(index_path=prompt_cache_path)
+                
                 # Initialize generator
                 generator = ImageGenerator(
                     backend=backend,
                     base_url=base_url,
-                    model=model
+                    model=model,
+                    prompt_cache=prompt_cache,
+                    cache_dir=event_config.get("thumbnail_cache_dir")
                 )
                 
                 # Generate image
@@ -460,6 +473,7 @@ class WorkflowController:
             if success and unload_model_after and backend == "ollama":
                 self.logger.info(f"Unloading image model from memory...")
                 generator.unload_model()
+            generator.close()
             
             if success:
                 self.logger.info(f"AI background generated: {bg_image_path}")
@@ -782,17 +796,20 @@ class WorkflowController:
             self.logger.info(f"Using AI model: {model}, unload_after: {unload_model_after}")
             
             # Initialize processor
-            processor = AIContentProcessor(model=model, logger=self.logger)
-            
-            # Process content (only correction)
-            success, error, output_files = processor.process_content(
-                srt_path=original_srt,
-                output_dir=str(output_dir),
-                correct_subtitles=True,
-                generate_summary=False,
-                summary_length="medium",
-                unload_model_after=unload_model_after
-            )
+            with AIContentProcessor(
+                model=model,
+                logger=self.logger,
+                keep_alive=ai_settings.get("keep_alive", "5m")
+            ) as processor:
+                # Process content (only correction)
+                success, error, output_files = processor.process_content(
+                    srt_path=original_srt,
+                    output_dir=str(output_dir),
+                    correct_subtitles=True,
+                    generate_summary=False,
+                    summary_length="medium",
+                    unload_model_after=unload_model_after
+                )
             
             if success:
                 self.logger.info(f"Subtitle correction completed: {output_files}")
@@ -881,18 +898,21 @@ class WorkflowController:
             self.logger.info(f"Using AI model: {model}, summary length: {summary_length}, languages: {summary_languages}, unload_after: {unload_model_after}")
             
             # Initialize processor
-            processor = AIContentProcessor(model=model, logger=self.logger)
-            
-            # Process content (only summary)
-            success, error, output_files = processor.process_content(
-                srt_path=srt_file,
-                output_dir=str(output_dir),
-                correct_subtitles=False,
-                generate_summary=True,
-                summary_length=summary_length,
-                summary_languages=summary_languages,
-                unload_model_after=unload_model_after
-            )
+            with AIContentProcessor(
+                model=model,
+                logger=self.logger,
+                keep_alive=ai_settings.get("keep_alive", "5m")
+            ) as processor:
+                # Process content (only summary)
+                success, error, output_files = processor.process_content(
+                    srt_path=srt_file,
+                    output_dir=str(output_dir),
+                    correct_subtitles=False,
+                    generate_summary=True,
+                    summary_length=summary_length,
+                    summary_languages=summary_languages,
+                    unload_model_after=unload_model_after
+                )
             
             if success:
                 self.logger.info(f"Content summary generated: {output_files}")
@@ -969,17 +989,20 @@ class WorkflowController:
             self.logger.info(f"AI settings: model={model}, correct={correct_subtitles}, summary={generate_summary}, unload_after={unload_model_after}")
             
             # Initialize processor
-            processor = AIContentProcessor(model=model, logger=self.logger)
-            
-            # Process content
-            success, error, output_files = processor.process_content(
-                srt_path=original_srt,
-                output_dir=str(output_dir),
-                correct_subtitles=correct_subtitles,
-                generate_summary=generate_summary,
-                summary_length=summary_length,
-                unload_model_after=unload_model_after
-            )
+            with AIContentProcessor(
+                model=model,
+                logger=self.logger,
+                keep_alive=ai_settings.get("keep_alive", "5m")
+            ) as processor:
+                # Process content
+                success, error, output_files = processor.process_content(
+                    srt_path=original_srt,
+                    output_dir=str(output_dir),
+                    correct_subtitles=correct_subtitles,
+                    generate_summary=generate_summary,
+                    summary_length=summary_length,
+                    unload_model_after=unload_model_after
+                )
             
             if success:
                 self.logger.info(f"AI content processing completed: {output_files}")
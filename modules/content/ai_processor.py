@@ -5,29 +5,65 @@ Corrects subtitles and generates summaries for downstream tasks
 import logging
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+
+
+# SRT blocks are separated by blank lines; each is "index\ntimestamp\ntext..."
+_SRT_BLOCK_SEPARATOR_RE = re.compile(r'\n\n+')
+_SRT_BLOCK_RE = re.compile(r'(\d+)[ \t\r]*\n([^\n]*)\n(.*)', re.S)
 
 
 class AIContentProcessor:
     """Uses Ollama to correct subtitles and generate content summaries"""
     
+    # Keep-alive connections to Ollama; covers concurrent correction batches
+    HTTP_POOL_SIZE = 8
+    
     def __init__(
         self,
         model: str = "qwen2.5:latest",
         host: str = "http://localhost:11434",
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        keep_alive: str = "5m"
     ):
+        """
+        Args:
+            model: Ollama model name
+            host: Ollama server URL
+            logger: Logger to use (defaults to the module logger)
+            keep_alive: How long Ollama keeps the model loaded after each request
+                        ("5m", "1h", "-1" to keep it loaded, "0" to unload)
+        """
         self.model = model
         self.host = host
         self.logger = logger or logging.getLogger(__name__)
         self.api_url = f"{host}/api/generate"
+        self.keep_alive = keep_alive
+        
+        # One session for every call so connections to Ollama are reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        self.session.close()
         
     def _check_ollama_available(self) -> bool:
         """Check if Ollama service is available"""
         try:
-            response = requests.get(f"{self.host}/api/tags", timeout=5)
+            response = self.session.get(f"{self.host}/api/tags", timeout=5)
             return response.status_code == 200
         except Exception as e:
             self.logger.error(f"Ollama not available: {e}")
@@ -36,7 +72,7 @@ class AIContentProcessor:
     def _check_model_available(self) -> bool:
         """Check if the specified model is available"""
         try:
-            response = requests.get(f"{self.host}/api/tags", timeout=5)
+            response = self.session.get(f"{self.host}/api/tags", timeout=5)
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 return any(m.get("name") == self.model for m in models)
@@ -45,13 +81,13 @@ class AIContentProcessor:
             self.logger.error(f"Failed to check model: {e}")
             return False
     
-    def _call_ollama(self, prompt: str, system_prompt: str = "", keep_alive: str = "5m") -> Optional[str]:
+    def _call_ollama(self, prompt: str, system_prompt: str = "", keep_alive: Optional[str] = None) -> Optional[str]:
         """Call Ollama API and get response
         
         Args:
             prompt: The prompt to send to the model
             system_prompt: System prompt for the model
-            keep_alive: Duration to keep model in memory after request (default: "5m")
+            keep_alive: Duration to keep model in memory after request (default: self.keep_alive)
                         Set to "0" to unload immediately after request
                         Examples: "5m" (5 minutes), "1h" (1 hour), "0" (unload immediately)
         """
@@ -60,12 +96,12 @@ class AIContentProcessor:
                 "model": self.model,
                 "prompt": prompt,
                 "stream": False,
-                "keep_alive": keep_alive
+                "keep_alive": keep_alive if keep_alive is not None else self.keep_alive
             }
             if system_prompt:
                 payload["system"] = system_prompt
             
-            response = requests.post(self.api_url, json=payload, timeout=300)
+            response = self.session.post(self.api_url, json=payload, timeout=300)
             
             if response.status_code == 200:
                 result = response.json()
@@ -90,7 +126,7 @@ class AIContentProcessor:
                 "prompt": "",
                 "keep_alive": "0"
             }
-            response = requests.post(self.api_url, json=payload, timeout=10)
+            response = self.session.post(self.api_url, json=payload, timeout=10)
             return response.status_code == 200
         except Exception as e:
             self.logger.error(f"Failed to unload model: {e}")
@@ -105,24 +141,17 @@ class AIContentProcessor:
     
     def _parse_srt_from_text(self, content: str) -> List[Dict]:
         """Parse SRT text content into structured data"""
-        # Split by double newline to get subtitle blocks
-        blocks = re.split(r'\n\n+', content.strip())
         subtitles = []
         
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                try:
-                    index = int(lines[0])
-                    timestamp = lines[1]
-                    text = '\n'.join(lines[2:])
-                    subtitles.append({
-                        'index': index,
-                        'timestamp': timestamp,
-                        'text': text
-                    })
-                except ValueError:
-                    continue
+        # Split by double newline to get subtitle blocks
+        for block in _SRT_BLOCK_SEPARATOR_RE.split(content.strip()):
+            match = _SRT_BLOCK_RE.match(block.strip())
+            if match:
+                subtitles.append({
+                    'index': int(match.group(1)),
+                    'timestamp': match.group(2),
+                    'text': match.group(3)
+                })
         
         return subtitles
     
@@ -134,11 +163,95 @@ class AIContentProcessor:
                 f.write(f"{sub['timestamp']}\n")
                 f.write(f"{sub['text']}\n\n")
     
+    def _correct_batch(self, batch: List[Dict], batch_number: int) -> List[Dict]:
+        """Correct one batch of subtitles; returns the original batch if the AI output is unusable"""
+        # Convert batch to SRT text
+        srt_text = ""
+        for sub in batch:
+            srt_text += f"{sub['index']}\n"
+            srt_text += f"{sub['timestamp']}\n"
+            srt_text += f"{sub['text']}\n\n"
+        
+        # Prepare strict prompt with example
+        system_prompt = """You are a subtitle text correction assistant. Fix ONLY the subtitle text content while preserving the exact SRT format.
+
+CRITICAL RULES:
+1) Keep the EXACT number of subtitle blocks
+2) Keep ALL timestamps unchanged
+3) Keep ALL index numbers unchanged  
+4) Keep ALL blank lines between blocks
+5) ONLY fix: typos, ASR errors, grammar, unnatural wording
+6) Output VALID SRT format
+
+Example input:
+1
+00:00:00,000 --> 00:00:02,300
+李政階妹平安
+
+2
+00:00:02,300 --> 00:00:05,900
+感謝祝我們來到他的面前
+
+Example output (same structure, corrected text):
+1
+00:00:00,000 --> 00:00:02,300
+李政道妹平安
+
+2
+00:00:02,300 --> 00:00:05,900
+感謝主我們來到他的面前"""
+        
+        prompt = f"""Correct the subtitle text. Output MUST have exactly {len(batch)} blocks with same timestamps and numbers.
+
+Input SRT ({len(batch)} blocks):
+<<<
+{srt_text.strip()}
+>>>
+
+Output corrected SRT (MUST be {len(batch)} blocks, same format):"""
+        
+        self.logger.info(f"Correcting batch {batch_number} ({len(batch)} segments)")
+        
+        corrected_batch_text = self._call_ollama(prompt, system_prompt)
+        
+        if not corrected_batch_text:
+            self.logger.warning(f"AI correction failed for batch, keeping original")
+            return batch
+        
+        # Parse AI response
+        try:
+            corrected_batch = self._parse_srt_from_text(corrected_batch_text)
+            
+            # Strict validation: must match batch size
+            if len(corrected_batch) != len(batch):
+                self.logger.warning(
+                    f"Batch structure mismatch (expected {len(batch)}, got {len(corrected_batch)}), "
+                    f"keeping original batch"
+                )
+                return batch
+            
+            # Verify timestamps match
+            timestamps_match = (
+                [sub['timestamp'] for sub in batch] == [sub['timestamp'] for sub in corrected_batch]
+            )
+            if not timestamps_match:
+                self.logger.warning("Timestamps changed in AI output, keeping original batch")
+                return batch
+            
+            # Success - use corrected batch
+            self.logger.info(f"Batch {batch_number} corrected successfully")
+            return corrected_batch
+            
+        except Exception as e:
+            self.logger.error(f"Failed to parse batch response: {e}, keeping original")
+            return batch
+    
     def correct_subtitles(
         self,
         srt_path: str,
         output_dir: str,
-        batch_size: int = 10
+        batch_size: int = 10,
+        max_concurrent_batches: int = 3
     ) -> Tuple[bool, Optional[str], Dict[str, str]]:
         """
         Correct subtitles using AI
@@ -147,6 +260,7 @@ class AIContentProcessor:
             srt_path: Path to original SRT file
             output_dir: Directory to save corrected SRT
             batch_size: Number of subtitle segments to correct at once
+            max_concurrent_batches: Number of batch requests sent to Ollama at a time
             
         Returns:
             (success, error_message, output_files)
@@ -168,95 +282,20 @@ class AIContentProcessor:
             self.logger.info(f"Parsed {len(subtitles)} subtitle segments")
             
             # Use batch processing for better reliability (smaller batches = better format compliance)
-            corrected_subtitles = []
             batch_size = 10  # Process 10 subtitle blocks at a time
+            batches = [
+                subtitles[batch_start:batch_start + batch_size]
+                for batch_start in range(0, len(subtitles), batch_size)
+            ]
             
-            for batch_start in range(0, len(subtitles), batch_size):
-                batch_end = min(batch_start + batch_size, len(subtitles))
-                batch = subtitles[batch_start:batch_end]
-                
-                # Convert batch to SRT text
-                srt_text = ""
-                for sub in batch:
-                    srt_text += f"{sub['index']}\n"
-                    srt_text += f"{sub['timestamp']}\n"
-                    srt_text += f"{sub['text']}\n\n"
-                
-                # Prepare strict prompt with example
-                system_prompt = """You are a subtitle text correction assistant. Fix ONLY the subtitle text content while preserving the exact SRT format.
-
-CRITICAL RULES:
-1) Keep the EXACT number of subtitle blocks
-2) Keep ALL timestamps unchanged
-3) Keep ALL index numbers unchanged  
-4) Keep ALL blank lines between blocks
-5) ONLY fix: typos, ASR errors, grammar, unnatural wording
-6) Output VALID SRT format
-
-Example input:
-1
-00:00:00,000 --> 00:00:02,300
-李政階妹平安
-
-2
-00:00:02,300 --> 00:00:05,900
-感謝祝我們來到他的面前
-
-Example output (same structure, corrected text):
-1
-00:00:00,000 --> 00:00:02,300
-李政道妹平安
-
-2
-00:00:02,300 --> 00:00:05,900
-感謝主我們來到他的面前"""
-                
-                prompt = f"""Correct the subtitle text. Output MUST have exactly {len(batch)} blocks with same timestamps and numbers.
-
-Input SRT ({len(batch)} blocks):
-<<<
-{srt_text.strip()}
->>>
-
-Output corrected SRT (MUST be {len(batch)} blocks, same format):"""
-                
-                self.logger.info(f"Correcting batch {batch_start//batch_size + 1} ({len(batch)} segments)")
-                
-                corrected_batch_text = self._call_ollama(prompt, system_prompt)
-                
-                if not corrected_batch_text:
-                    self.logger.warning(f"AI correction failed for batch, keeping original")
-                    corrected_subtitles.extend(batch)
-                    continue
-                
-                # Parse AI response
-                try:
-                    corrected_batch = self._parse_srt_from_text(corrected_batch_text)
-                    
-                    # Strict validation: must match batch size
-                    if len(corrected_batch) != len(batch):
-                        self.logger.warning(
-                            f"Batch structure mismatch (expected {len(batch)}, got {len(corrected_batch)}), "
-                            f"keeping original batch"
-                        )
-                        corrected_subtitles.extend(batch)
-                    else:
-                        # Verify timestamps match
-                        timestamps_match = all(
-                            orig['timestamp'] == corr['timestamp'] 
-                            for orig, corr in zip(batch, corrected_batch)
-                        )
-                        if not timestamps_match:
-                            self.logger.warning("Timestamps changed in AI output, keeping original batch")
-                            corrected_subtitles.extend(batch)
-                        else:
-                            # Success - use corrected batch
-                            corrected_subtitles.extend(corrected_batch)
-                            self.logger.info(f"Batch corrected successfully")
-                            
-                except Exception as e:
-                    self.logger.error(f"Failed to parse batch response: {e}, keeping original")
-                    corrected_subtitles.extend(batch)
+            # Batches are independent; keep a few in flight so the model stays busy.
+            # map() returns them in order, so blocks are reassembled as they were
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrent_batches)) as executor:
+                corrected_batches = list(executor.map(
+                    self._correct_batch, batches, range(1, len(batches) + 1)
+                ))
+            
+            corrected_subtitles = [sub for batch in corrected_batches for sub in batch]
             
             # Write corrected SRT
             output_path = Path(output_dir)
@@ -484,7 +523,7 @@ Output ONLY the image prompt, nothing else."""
 
 Create a prompt that visually represents the sermon's main theme. Output ONLY the prompt text:"""
 
-            image_prompt = self._call_ollama(prompt, system_prompt, keep_alive="5m")
+            image_prompt = self._call_ollama(prompt, system_prompt)
             
             if image_prompt:
                 # Clean up the prompt
@@ -10,6 +10,11 @@ import os
 from pathlib import Path
 from typing import Optional, List, Dict
 
+try:
+    from modules.subtitles.find_outputs import find_subtitle_outputs
+except ImportError:  # run directly as a script (see QUICKSTART.md)
+    from find_outputs import find_subtitle_outputs
+
 
 class WhisperCppEngine:
     """Subtitle generation using whisper.cpp (default engine)"""
@@ -255,21 +260,9 @@ class WhisperCppEngine:
             # Collect output files
             # whisper.cpp outputs files based on the input filename
             # For example: input.wav.srt, input.wav.vtt
-            input_filename = Path(input_path).name
-            
-            for fmt in formats:
-                # Try different possible output names
-                possible_names = [
-                    output_dir_path / f"{input_filename}.{fmt}",  # audio.wav.srt
-                    output_dir_path / f"{base_name}.{fmt}",       # audio.srt
-                    output_dir_path / Path(input_path).name.replace(Path(input_path).suffix, f".{fmt}"),  # audio.srt (without .wav)
-                ]
-                
-                for output_path in possible_names:
-                    if output_path.exists():
-                        output_files[fmt] = str(output_path)
-                        self.logger.info(f"Found {fmt} file: {output_path}")
-                        break
+            output_files = find_subtitle_outputs(output_dir_path, input_path, base_name, formats)
+            for fmt, output_path in output_files.items():
+                self.logger.info(f"Found {fmt} file: {output_path}")
             
             if not output_files:
                 # List all files in output directory for debugging
@@ -0,0 +1,64 @@
+"""
+Subtitle output discovery - Locate the files a subtitle engine wrote
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List
+
+
+def subtitle_output_candidates(input_path: str, base_name: str, fmt: str) -> List[str]:
+    """
+    File names a subtitle engine may have used for one format, in priority order
+    
+    Args:
+        input_path: Audio/video file that was transcribed
+        base_name: Sanitized stem used for output files
+        fmt: Subtitle format extension (srt, vtt, ...)
+    """
+    path = Path(input_path)
+    return _candidate_names(path.name, path.suffix, base_name, fmt)
+
+
+def _candidate_names(input_name: str, input_suffix: str, base_name: str, fmt: str) -> List[str]:
+    return [
+        f"{input_name}.{fmt}",                              # audio.wav.srt
+        f"{base_name}.{fmt}",                               # audio.srt
+        input_name.replace(input_suffix, f".{fmt}"),        # audio.srt (without .wav)
+    ]
+
+
+def find_subtitle_outputs(
+    output_dir: str,
+    input_path: str,
+    base_name: str,
+    formats: List[str]
+) -> Dict[str, str]:
+    """
+    Find the generated subtitle file for each format
+    
+    The directory is listed once and candidates are matched against the
+    listing, instead of stat()ing every candidate path.
+    
+    Returns:
+        Dict mapping format to file path, for the formats that were found
+    """
+    try:
+        with os.scandir(output_dir) as entries:
+            names = {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+    
+    # Split the input path once, not per format and candidate
+    path = Path(input_path)
+    input_name, input_suffix = path.name, path.suffix
+    output_dir = Path(output_dir)
+    
+    output_files = {}
+    for fmt in formats:
+        for candidate in _candidate_names(input_name, input_suffix, base_name, fmt):
+            if candidate in names:
+                output_files[fmt] = str(output_dir / candidate)
+                break
+    
+    return output_files
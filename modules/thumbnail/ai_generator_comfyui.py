@@ -2,23 +2,118 @@
 AI Thumbnail Generator (ComfyUI) - Generate AI images using ComfyUI API
 """
 
+import copy
+import hashlib
 import json
 import logging
+import os
+import random
+import shutil
+import socket
+import threading
 import time
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 import requests
-import websocket
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    import websocket
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """Decode JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _replace_file(path, data: bytes):
+    """
+    Write data to path through a temporary file and os.replace()
+    
+    The path may be a hard link to a shared file (a fallback asset or a
+    ComfyUI output), so it is swapped for a new file, never written into.
+    """
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=8)
+def _read_workflow_template(path: str, mtime_ns: int) -> dict:
+    """Parse a workflow template file once per modification; callers must not mutate it"""
+    return _json_loads(Path(path).read_bytes())
 
 
 class ComfyUIGenerator:
     """Generate AI images using ComfyUI backend"""
     
+    # Node IDs in the workflow template
+    PROMPT_NODE = "45"   # CLIPTextEncode
+    SIZE_NODE = "41"     # EmptySD3LatentImage
+    SAMPLER_NODE = "44"  # KSampler
+    SAVE_NODE = "9"      # SaveImage
+    
+    # Keep-alive connections per host; sized for batch workers plus downloads
+    HTTP_POOL_SIZE = 16
+    
+    # Transient gateway errors (e.g. while ComfyUI reloads a model) are retried
+    # with backoff. Only GETs: retrying POST /prompt would queue the job twice.
+    # A refused connection means the server is down, so it fails at once
+    HTTP_RETRY = Retry(
+        total=3,
+        connect=0,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False
+    )
+    
+    # Seconds a successful check_server() result is reused
+    SERVER_CHECK_TTL = 30.0
+    
+    # Most prompts whose WebSocket events are kept until they are polled;
+    # the oldest are dropped (and polled via /history) beyond this
+    MAX_WS_PROMPTS = 64
+    
+    # Parameters substituted into the pre-serialized prompt body; the prompt
+    # goes last so user text is never rescanned for placeholders
+    NUMBER_PARAMS = ("width", "height", "steps", "seed")
+    TEXT_PARAMS = ("filename_prefix", "prompt")
+    
+    # (node, input, parameter) assignments applied for every generation
+    WORKFLOW_INPUTS = (
+        (PROMPT_NODE, "text", "prompt"),
+        (SIZE_NODE, "width", "width"),
+        (SIZE_NODE, "height", "height"),
+        (SAMPLER_NODE, "steps", "steps"),
+        (SAMPLER_NODE, "seed", "seed"),
+        (SAVE_NODE, "filename_prefix", "filename_prefix"),
+    )
+    
     def __init__(
         self,
         server_url: str = "http://127.0.0.1:8188",
-        workflow_template_path: Optional[str] = None
+        workflow_template_path: Optional[str] = None,
+        comfyui_output_dir: Optional[str] = None,
+        replay_cache_dir: Optional[str] = None
     ):
         """
         Initialize ComfyUI generator
@@ -26,12 +121,47 @@ class ComfyUIGenerator:
         Args:
             server_url: ComfyUI server URL (default: http://127.0.0.1:8188)
             workflow_template_path: Path to workflow API JSON template
+            comfyui_output_dir: ComfyUI's output folder, used to skip the HTTP
+                download when the server runs on this machine
+            replay_cache_dir: Folder to keep images generated with an explicit
+                seed; the same prompt, size, steps and seed are then copied
+                from it instead of being generated again (None to disable)
         """
         self.server_url = server_url.rstrip('/')
         self.workflow_template_path = workflow_template_path or str(
             Path(__file__).parent / "image_z_image_turbo_API.json"
         )
+        self.comfyui_output_dir = Path(comfyui_output_dir) if comfyui_output_dir else None
+        self.replay_cache_dir = Path(replay_cache_dir) if replay_cache_dir else None
+        self._is_local_server = urlparse(self.server_url).hostname in ("127.0.0.1", "localhost", "::1")
+        self._workflow_template: Optional[dict] = None
+        self._prompt_body_template: Optional[bytes] = None
+        # (monotonic time, deep) of the last successful check_server()
+        self._server_check: Optional[Tuple[float, bool]] = None
         self.logger = self._setup_logger()
+        # Shared across calls (and batch workers) so connections are kept alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=self.HTTP_RETRY
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # One client ID and event WebSocket serve every prompt we submit;
+        # events are routed to waiters by prompt_id
+        self.client_id = str(uuid.uuid4())
+        self._ws: Optional["websocket.WebSocket"] = None
+        self._ws_lock = threading.Lock()
+        self._ws_events = threading.Condition()
+        self._ws_queues: Dict[str, List[dict]] = {}
+        self._ws_finished = deque(maxlen=self.MAX_WS_PROMPTS)
+        # prompt_id -> the socket it was subscribed on at submit time
+        self._ws_prompts: Dict[str, "websocket.WebSocket"] = {}
+        
+        # Fetches finished images while the caller waits on the next prompt
+        self._downloader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="comfyui-download")
         
     def _setup_logger(self) -> logging.Logger:
         logger = logging.getLogger("ComfyUIGenerator")
@@ -65,15 +195,54 @@ class ComfyUIGenerator:
         Returns:
             (success, error_message)
         """
+        replay_path = self._replay_path(prompt, width, height, steps, seed)
+        if self._replay(replay_path, output_path):
+            return True, None
+        
+        prompt_id, error = self.submit(
+            prompt,
+            width=width,
+            height=height,
+            steps=steps,
+            seed=seed,
+            filename_prefix=filename_prefix
+        )
+        if not prompt_id:
+            return False, error
+        
+        result = self.poll(prompt_id, output_path, timeout).result()
+        if result[0]:
+            self._record_replay(output_path, replay_path)
+        return result
+    
+    def submit(
+        self,
+        prompt: str,
+        width: int = 1280,
+        height: int = 720,
+        steps: int = 9,
+        seed: Optional[int] = None,
+        filename_prefix: str = "thumbnail"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Queue a generation on the ComfyUI server without waiting for it
+        
+        Args:
+            prompt: Text prompt for image generation
+            width: Image width
+            height: Image height
+            steps: Number of sampling steps
+            seed: Random seed (None for random)
+            filename_prefix: Filename prefix in ComfyUI output folder
+            
+        Returns:
+            (prompt_id, error_message)
+        """
         try:
             self.logger.info(f"Generating AI image with ComfyUI: {prompt[:50]}...")
             
-            # Load workflow template
-            workflow = self._load_workflow_template()
-            
-            # Modify workflow with parameters
-            workflow = self._customize_workflow(
-                workflow,
+            # Fill generation parameters into the pre-serialized workflow
+            body = self._build_prompt_body(
                 prompt=prompt,
                 width=width,
                 height=height,
@@ -82,45 +251,207 @@ class ComfyUIGenerator:
                 filename_prefix=filename_prefix
             )
             
+            # Subscribe to progress events before queueing so none are missed
+            ws = self._ensure_ws()
+            
             # Submit workflow to ComfyUI
-            prompt_id = self._queue_prompt(workflow)
+            prompt_id = self._queue_prompt(body)
             if not prompt_id:
-                return False, "Failed to queue prompt"
+                return None, "Failed to queue prompt"
+            
+            if ws is not None:
+                with self._ws_events:
+                    self._ws_prompts[prompt_id] = ws
+                    stale = list(self._ws_prompts)[:-self.MAX_WS_PROMPTS]
+                for stale_id in stale:
+                    self._forget_ws_prompt(stale_id)
             
             self.logger.info(f"Queued prompt with ID: {prompt_id}")
+            return prompt_id, None
+            
+        except Exception as e:
+            self.logger.error(f"Failed to generate image: {e}")
+            return None, str(e)
+    
+    def poll(
+        self,
+        prompt_id: str,
+        output_path: str,
+        timeout: int = 120
+    ) -> "Future[Tuple[bool, Optional[str]]]":
+        """
+        Wait for a submitted prompt to finish and start fetching its image
+        
+        The image is copied or downloaded in the background, so the caller
+        can wait on the next prompt while this one transfers.
+        
+        Args:
+            prompt_id: ID returned by submit()
+            output_path: Where to save the generated image
+            timeout: Maximum wait time in seconds
             
+        Returns:
+            Future resolving to (success, error_message)
+        """
+        try:
             # Wait for completion
-            success, result = self._wait_for_completion(prompt_id, timeout)
+            # Events only reach the socket the prompt was subscribed on; if
+            # that one has closed or been replaced, poll the history instead
+            with self._ws_events:
+                ws = self._ws_prompts.pop(prompt_id, None)
+            if ws is not None and ws is self._ws:
+                success, result = self._wait_for_completion_ws(prompt_id, ws, timeout)
+            else:
+                if ws is not None:
+                    self.logger.warning("WebSocket interrupted, falling back to history")
+                    self._forget_ws_prompt(prompt_id)
+                success, result = self._wait_for_completion(prompt_id, timeout)
             if not success:
-                return False, result
+                return self._resolved(False, result)
             
             # Get output image path
             image_filename = result.get('filename')
             if not image_filename:
-                return False, "No output filename returned"
+                return self._resolved(False, "No output filename returned")
             
             # Copy from ComfyUI output to target location
-            comfyui_output = result.get('subfolder', '')
-            success, error = self._copy_output_image(
+            return self._downloader.submit(
+                self._copy_output_image,
                 image_filename,
-                comfyui_output,
+                result.get('subfolder', ''),
                 output_path
             )
             
-            if success:
-                self.logger.info(f"Image saved to: {output_path}")
-                return True, None
-            else:
-                return False, error
-                
         except Exception as e:
             self.logger.error(f"Failed to generate image: {e}")
-            return False, str(e)
+            return self._resolved(False, str(e))
+    
+    def generate_batch(
+        self,
+        jobs: List[Dict]
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Generate several images, overlapping rendering with downloads
+        
+        Every job is queued up front so the server renders back to back;
+        each finished image is then fetched while the next one renders.
+        
+        Args:
+            jobs: List of keyword argument dicts for generate()
+            
+        Returns:
+            List of (success, error_message), in the same order as jobs
+        """
+        submitted = []
+        replay_paths = []
+        for job in jobs:
+            job = dict(job)
+            output_path = job.pop("output_path")
+            timeout = job.pop("timeout", 120)
+            replay_path = self._replay_path(
+                job["prompt"], job.get("width", 1280), job.get("height", 720),
+                job.get("steps", 9), job.get("seed")
+            )
+            replay_paths.append(replay_path)
+            if self._replay(replay_path, output_path):
+                submitted.append((None, None, output_path, timeout))
+                continue
+            prompt_id, error = self.submit(**job)
+            submitted.append((prompt_id, error, output_path, timeout))
+        
+        # ComfyUI runs its queue in order, so wait on the prompts in order
+        downloads = [
+            self.poll(prompt_id, output_path, timeout) if prompt_id else self._resolved(error is None, error)
+            for prompt_id, error, output_path, timeout in submitted
+        ]
+        wait(downloads)
+        
+        results = []
+        for index, future in enumerate(downloads):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = (False, str(e))
+            
+            if not result[0]:
+                self.logger.warning(f"Batch job {index + 1}/{len(jobs)} failed: {result[1]}")
+            elif submitted[index][0]:
+                self._record_replay(submitted[index][2], replay_paths[index])
+            results.append(result)
+        
+        return results
+    
+    def _replay_path(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        steps: int,
+        seed: Optional[int]
+    ) -> Optional[Path]:
+        """Replay cache file for a generation, or None if it cannot be replayed"""
+        # Without an explicit seed the image is random, so never replay it
+        if self.replay_cache_dir is None or not seed:
+            return None
+        try:
+            template = Path(self.workflow_template_path).resolve()
+            template_version = f"{template}:{template.stat().st_mtime_ns}"
+        except OSError:
+            return None
+        key = f"{prompt}|{width}|{height}|{steps}|{seed}|{template_version}"
+        return self.replay_cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.png"
+    
+    def _replay(self, replay_path: Optional[Path], output_path: str) -> bool:
+        """Copy a previously generated image to output_path if there is one"""
+        if replay_path is None or not replay_path.is_file():
+            return False
+        output = Path(output_path)
+        temp_path = output.with_name(f".{output.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            # Replace rather than overwrite; output_path may be a hard link
+            shutil.copyfile(replay_path, temp_path)
+            os.replace(temp_path, output)
+        except OSError as e:
+            temp_path.unlink(missing_ok=True)
+            self.logger.warning(f"Could not replay cached image: {e}")
+            return False
+        self.logger.info(f"Replayed cached image to: {output_path}")
+        return True
+    
+    def _record_replay(self, output_path: str, replay_path: Optional[Path]):
+        """Keep a generated image for later replay"""
+        if replay_path is None:
+            return
+        try:
+            replay_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = replay_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(output_path, temp_path)
+            os.replace(temp_path, replay_path)
+        except OSError as e:
+            self.logger.warning(f"Could not store image in replay cache: {e}")
+    
+    @staticmethod
+    def _resolved(success: bool, error: Optional[str]) -> "Future[Tuple[bool, Optional[str]]]":
+        """Wrap an immediate result in a completed Future"""
+        future = Future()
+        future.set_result((success, error))
+        return future
     
     def _load_workflow_template(self) -> dict:
-        """Load workflow template from JSON file"""
-        with open(self.workflow_template_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        """Load workflow template from JSON file (shared between generators)"""
+        path = self.workflow_template_path
+        return _read_workflow_template(path, os.stat(path).st_mtime_ns)
+    
+    def _get_workflow_template(self) -> dict:
+        """Return a fresh copy of the workflow template, loading and validating it once"""
+        if self._workflow_template is None:
+            workflow = self._load_workflow_template()
+            missing = sorted({node for node, _, _ in self.WORKFLOW_INPUTS if node not in workflow})
+            if missing:
+                raise ValueError(f"Workflow template is missing required nodes: {missing}")
+            self._workflow_template = workflow
+        return copy.deepcopy(self._workflow_template)
     
     def _customize_workflow(
         self,
@@ -133,43 +464,72 @@ class ComfyUIGenerator:
         filename_prefix: str
     ) -> dict:
         """Customize workflow with generation parameters"""
-        # Update prompt (node 45: CLIPTextEncode)
-        if "45" in workflow:
+        params = {
             # Add negative keywords to prevent text in images
-            enhanced_prompt = f"{prompt}, no text, no words, no letters, no typography, no watermarks"
-            workflow["45"]["inputs"]["text"] = enhanced_prompt
+            "prompt": f"{prompt}, no text, no words, no letters, no typography, no watermarks",
+            "width": width,
+            "height": height,
+            "steps": steps,
+            "seed": seed,
+            "filename_prefix": filename_prefix,
+        }
         
-        # Update image size (node 41: EmptySD3LatentImage)
-        if "41" in workflow:
-            workflow["41"]["inputs"]["width"] = width
-            workflow["41"]["inputs"]["height"] = height
+        for node, input_name, param in self.WORKFLOW_INPUTS:
+            workflow[node]["inputs"][input_name] = params[param]
         
-        # Update sampling steps and seed (node 44: KSampler)
-        if "44" in workflow:
-            workflow["44"]["inputs"]["steps"] = steps
-            workflow["44"]["inputs"]["seed"] = seed
+        return workflow
+    
+    @staticmethod
+    def _placeholder(param: str) -> str:
+        return f"__CMAS_{param.upper()}__"
+    
+    def _get_prompt_body_template(self) -> bytes:
+        """
+        Serialize the /prompt request body once, with placeholders for the
+        per-generation parameters
+        """
+        if self._prompt_body_template is None:
+            placeholders = {
+                param: self._placeholder(param)
+                for param in self.NUMBER_PARAMS + self.TEXT_PARAMS
+            }
+            workflow = self._customize_workflow(self._get_workflow_template(), **placeholders)
+            body = json.dumps({"prompt": workflow, "client_id": self.client_id}).encode()
+            
+            for placeholder in placeholders.values():
+                if body.count(placeholder.encode()) != 1:
+                    raise ValueError(f"Workflow template cannot be precompiled: {placeholder} is ambiguous")
+            
+            self._prompt_body_template = body
+        return self._prompt_body_template
+    
+    def _build_prompt_body(self, **params) -> bytes:
+        """Build the /prompt request body for one generation"""
+        body = self._get_prompt_body_template()
         
-        # Update output filename prefix (node 9: SaveImage)
-        if "9" in workflow:
-            workflow["9"]["inputs"]["filename_prefix"] = filename_prefix
+        # Number values replace the whole quoted placeholder
+        for param in self.NUMBER_PARAMS:
+            placeholder = f'"{self._placeholder(param)}"'.encode()
+            body = body.replace(placeholder, str(int(params[param])).encode())
         
-        return workflow
+        # Text values sit inside JSON strings: substitute the escaped content
+        for param in self.TEXT_PARAMS:
+            value = json.dumps(str(params[param]))[1:-1]
+            body = body.replace(self._placeholder(param).encode(), value.encode())
+        
+        return body
     
     def _generate_seed(self) -> int:
         """Generate random seed"""
-        return int(time.time() * 1000) % (2**32)
+        return random.getrandbits(32)
     
-    def _queue_prompt(self, workflow: dict) -> Optional[str]:
-        """Submit workflow to ComfyUI queue"""
+    def _queue_prompt(self, body: bytes) -> Optional[str]:
+        """Submit a serialized /prompt request body to the ComfyUI queue"""
         try:
-            payload = {
-                "prompt": workflow,
-                "client_id": str(uuid.uuid4())
-            }
-            
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/prompt",
-                json=payload,
+                data=body,
+                headers={"Content-Type": "application/json"},
                 timeout=10
             )
             
@@ -184,20 +544,164 @@ class ComfyUIGenerator:
             self.logger.error(f"Error queuing prompt: {e}")
             return None
     
+    def _ensure_ws(self) -> Optional["websocket.WebSocket"]:
+        """
+        Open the shared event WebSocket (once) and start its reader thread
+        
+        Returns:
+            The open socket, or None if it could not be opened
+        """
+        with self._ws_lock:
+            if self._ws is not None:
+                return self._ws
+            
+            ws_url = self.server_url.replace("http://", "ws://", 1).replace("https://", "wss://", 1)
+            try:
+                import websocket
+                ws = websocket.create_connection(
+                    f"{ws_url}/ws?clientId={self.client_id}",
+                    timeout=10
+                )
+            except Exception as e:
+                self.logger.warning(f"WebSocket unavailable, polling history instead: {e}")
+                return None
+            
+            # The reader blocks until the next event arrives
+            ws.settimeout(None)
+            self._ws = ws
+            threading.Thread(target=self._read_ws, args=(ws,), daemon=True).start()
+            return ws
+    
+    def _read_ws(self, ws: "websocket.WebSocket"):
+        """Route WebSocket events to waiting prompts until the socket closes"""
+        try:
+            while True:
+                message = ws.recv()
+                
+                # Skip binary preview frames
+                if not isinstance(message, str):
+                    continue
+                
+                msg = _json_loads(message)
+                prompt_id = (msg.get("data") or {}).get("prompt_id")
+                if not prompt_id:
+                    continue
+                
+                with self._ws_events:
+                    if prompt_id in self._ws_finished:
+                        continue
+                    if prompt_id not in self._ws_queues and len(self._ws_queues) >= self.MAX_WS_PROMPTS:
+                        # Waiters re-queue on every wakeup, so the oldest
+                        # queue belongs to a prompt nobody is waiting on
+                        del self._ws_queues[next(iter(self._ws_queues))]
+                    self._ws_queues.setdefault(prompt_id, []).append(msg)
+                    self._ws_events.notify_all()
+                    
+        except Exception as e:
+            if self._ws is ws:
+                self.logger.warning(f"WebSocket closed: {e}")
+        finally:
+            with self._ws_lock:
+                current = self._ws is ws
+                if current:
+                    self._ws = None
+            # A replacement socket's events must survive a late cleanup
+            self._drop_ws_state(ws, clear_queues=current)
+            try:
+                ws.close()
+            except Exception:
+                pass
+    
+    def _forget_ws_prompt(self, prompt_id: str):
+        """Drop a prompt's queued events and ignore any that still arrive"""
+        with self._ws_events:
+            self._ws_prompts.pop(prompt_id, None)
+            self._ws_queues.pop(prompt_id, None)
+            self._ws_finished.append(prompt_id)
+    
+    def _drop_ws_state(self, ws: "websocket.WebSocket", clear_queues: bool = True):
+        """Forget the prompts subscribed on a closed socket and wake their waiters"""
+        with self._ws_events:
+            for prompt_id in [p for p, sock in self._ws_prompts.items() if sock is ws]:
+                del self._ws_prompts[prompt_id]
+            if clear_queues:
+                self._ws_queues.clear()
+            self._ws_events.notify_all()
+    
+    def _wait_for_completion_ws(
+        self,
+        prompt_id: str,
+        ws: "websocket.WebSocket",
+        timeout: int
+    ) -> Tuple[bool, any]:
+        """
+        Wait for completion using WebSocket events
+        
+        The SaveImage node's "executed" event already carries the output
+        filename, so /history is only queried if the stream breaks or the
+        event has no images (e.g. a fully cached run).
+        
+        Args:
+            ws: Socket the prompt was subscribed on in submit()
+        """
+        deadline = time.time() + timeout
+        
+        try:
+            while True:
+                with self._ws_events:
+                    events = self._ws_queues.pop(prompt_id, None)
+                    if not events:
+                        if self._ws is not ws:
+                            self.logger.warning("WebSocket interrupted, falling back to history")
+                            break
+                        
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            return False, "Timeout waiting for completion"
+                        
+                        self._ws_events.wait(remaining)
+                        continue
+                
+                for msg in events:
+                    msg_type = msg.get("type")
+                    data = msg.get("data") or {}
+                    
+                    # SaveImage node finished
+                    if msg_type == "executed" and data.get("node") == self.SAVE_NODE:
+                        images = (data.get("output") or {}).get("images")
+                        if images:
+                            return True, images[0]
+                        return self._wait_for_completion(prompt_id, max(deadline - time.time(), 1))
+                    
+                    if msg_type in ("execution_error", "execution_interrupted"):
+                        error_msg = data.get("exception_message", "Unknown error")
+                        return False, f"Workflow failed: {error_msg}"
+                    
+                    # Execution finished without a SaveImage event
+                    if msg_type == "executing" and data.get("node") is None:
+                        return self._wait_for_completion(prompt_id, max(deadline - time.time(), 1))
+        finally:
+            self._forget_ws_prompt(prompt_id)
+        
+        return self._wait_for_completion(prompt_id, max(deadline - time.time(), 1))
+    
     def _wait_for_completion(self, prompt_id: str, timeout: int) -> Tuple[bool, any]:
         """Wait for workflow completion and get result"""
         try:
             start_time = time.time()
+            prompt_key = prompt_id.encode()
             
             while time.time() - start_time < timeout:
                 # Check history for completion
-                response = requests.get(
+                response = self.session.get(
                     f"{self.server_url}/history/{prompt_id}",
                     timeout=10
                 )
                 
-                if response.status_code == 200:
-                    history = response.json()
+                # Until the prompt finishes the history is just "{}"; only
+                # decode a body that actually mentions this prompt
+                if response.status_code == 200 and prompt_key in response.content:
+                    history = _json_loads(response.content)
                     
                     if prompt_id in history:
                         prompt_status = history[prompt_id]
@@ -206,9 +710,10 @@ class ComfyUIGenerator:
                         if "outputs" in prompt_status:
                             outputs = prompt_status["outputs"]
                             
-                            # Find SaveImage node output (node 9)
-                            if "9" in outputs and "images" in outputs["9"]:
-                                images = outputs["9"]["images"]
+                            # Find SaveImage node output
+                            save_output = outputs.get(self.SAVE_NODE, {})
+                            if "images" in save_output:
+                                images = save_output["images"]
                                 if images:
                                     return True, images[0]
                         
@@ -236,6 +741,21 @@ class ComfyUIGenerator:
     ) -> Tuple[bool, Optional[str]]:
         """Copy generated image from ComfyUI output to target path"""
         try:
+            # Local server: take the file straight from ComfyUI's output folder
+            if self.comfyui_output_dir and self._is_local_server:
+                source_path = self.comfyui_output_dir / subfolder / filename
+                if source_path.is_file():
+                    target = Path(target_path)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.unlink(missing_ok=True)
+                    try:
+                        os.link(source_path, target)
+                    except OSError:
+                        # Different filesystem or links unsupported
+                        shutil.copyfile(source_path, target)
+                    self.logger.info(f"Image saved to: {target_path}")
+                    return True, None
+            
             # Download image from ComfyUI server
             params = {
                 "filename": filename,
@@ -243,7 +763,7 @@ class ComfyUIGenerator:
                 "type": "output"
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f"{self.server_url}/view",
                 params=params,
                 timeout=30
@@ -252,8 +772,8 @@ class ComfyUIGenerator:
             if response.status_code == 200:
                 # Save to target path
                 Path(target_path).parent.mkdir(parents=True, exist_ok=True)
-                with open(target_path, 'wb') as f:
-                    f.write(response.content)
+                _replace_file(target_path, response.content)
+                self.logger.info(f"Image saved to: {target_path}")
                 return True, None
             else:
                 return False, f"Failed to download image: {response.status_code}"
@@ -262,13 +782,46 @@ class ComfyUIGenerator:
             self.logger.error(f"Error copying output image: {e}")
             return False, str(e)
     
-    def check_server(self) -> bool:
-        """Check if ComfyUI server is available"""
+    def close(self):
+        """Finish pending downloads, then close the event WebSocket and HTTP session"""
+        self._downloader.shutdown(wait=True)
+        with self._ws_lock:
+            ws, self._ws = self._ws, None
+        if ws is not None:
+            self._drop_ws_state(ws)
+            ws.close()
+        self.session.close()
+    
+    def check_server(self, deep: bool = False) -> bool:
+        """
+        Check if ComfyUI server is available
+        
+        Args:
+            deep: Verify the HTTP API answers (GET /system_stats) instead of
+                  only connecting to the port
+        
+        A successful check is remembered for SERVER_CHECK_TTL seconds.
+        """
+        last_ok = self._server_check
+        if last_ok is not None and time.monotonic() - last_ok[0] < self.SERVER_CHECK_TTL:
+            if last_ok[1] or not deep:
+                return True
+        
         try:
-            response = requests.get(f"{self.server_url}/system_stats", timeout=5)
-            return response.status_code == 200
+            if deep:
+                response = self.session.get(f"{self.server_url}/system_stats", timeout=5)
+                available = response.status_code == 200
+            else:
+                url = urlparse(self.server_url)
+                port = url.port or (443 if url.scheme == "https" else 80)
+                with socket.create_connection((url.hostname, port), timeout=2):
+                    available = True
         except:
-            return False
+            available = False
+        
+        if available:
+            self._server_check = (time.monotonic(), deep)
+        return available
 
 
 def main():
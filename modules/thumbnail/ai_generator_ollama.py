@@ -4,21 +4,137 @@ Supports multiple backends: Stable Diffusion WebUI, ComfyUI, or fallback assets
 """
 
 import logging
-import requests
-import base64
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict
+from typing import TYPE_CHECKING, Optional, Dict
 import json
 
+if TYPE_CHECKING:
+    from modules.thumbnail.prompt_cache import PromptCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+
+def _json_loads(data):
+    """Decode JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _b64decode(data) -> bytes:
+    """Decode base64, using pybase64's SIMD decoder when it is installed"""
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    if pybase64 is not None:
+        return pybase64.b64decode(data, validate=False)
+    import base64
+    return base64.b64decode(data)
+
+
+def _replace_file(path, data: bytes):
+    """
+    Write data to path through a temporary file and os.replace()
+    
+    The path may be a hard link to a shared file (a fallback asset or a
+    cached image), so it is swapped for a new file, never written into.
+    """
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+# Opening of a JSON "images" array whose first item is a string
+_IMAGES_FIELD = re.compile(rb'"images"\s*:\s*\[\s*"')
+
+
+def _write_first_image(chunks, file) -> int:
+    """
+    Decode the first base64 string of a JSON "images" array into a file
+    
+    The response is consumed chunk by chunk, so neither the JSON document
+    nor the base64 text is ever held in memory as a whole.
+    
+    Args:
+        chunks: Iterable of raw response bytes
+        file: Binary file object to write the decoded image to
+        
+    Returns:
+        Number of bytes written (0 if the response has no image)
+    """
+    chunks = iter(chunks)
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        match = _IMAGES_FIELD.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        # Keep enough of the tail to match a key split across chunks
+        buffer = buffer[-64:]
+    else:
+        return 0
+    
+    written = 0
+    carry = b""
+    while True:
+        end = buffer.find(b'"')
+        if end != -1:
+            buffer = buffer[:end]
+        
+        # Base64 only ever contains the "\/" escape; decode whole quads
+        data = carry + buffer.replace(b"\\", b"")
+        usable = len(data) - len(data) % 4
+        if usable:
+            written += file.write(_b64decode(data[:usable]))
+        carry = data[usable:]
+        
+        if end != -1:
+            break
+        buffer = next(chunks, None)
+        if buffer is None:
+            raise ValueError("Image data in response is truncated")
+    
+    if carry:
+        raise ValueError("Image data in response is not valid base64")
+    return written
+
 
 class ImageGenerator:
     """Generates background images for thumbnails"""
     
+    # Keep-alive connections per host; sized for generate_batch() workers
+    HTTP_POOL_SIZE = 16
+    
+    # Image responses larger than this (or of unknown size) are streamed to
+    # disk in chunks; smaller ones are parsed in one go
+    STREAM_THRESHOLD = 1024 * 1024
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
     def __init__(
         self, 
         backend: str = "stable-diffusion",
         base_url: str = "http://localhost:7860",
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        prompt_cache: Optional["PromptCache"] = None,
+        cache_dir: Optional[str] = None
     ):
         """
         Initialize image generator
@@ -27,17 +143,82 @@ class ImageGenerator:
             backend: "ollama", "stable-diffusion", "comfyui", or "fallback"
             base_url: API base URL (http://localhost:11434 for Ollama, http://localhost:7860 for SD)
             model: Model name (required for Ollama, optional for others)
+            prompt_cache: Reuse (or, for SD, refine) earlier images for similar prompts
+            cache_dir: Keep SD images here, keyed by request, and reuse exact repeats
         """
         self.backend = backend
         self.base_url = base_url
         self.model = model
+        self.prompt_cache = prompt_cache
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.logger = self._setup_logger()
+        
+        # Created on first use, so the fallback backend never loads requests
+        self._session = None
+        self._session_lock = threading.Lock()
+        
+        # Backend name -> generator; all share the same call signature
+        self._dispatch = {
+            "ollama": self._generate_ollama,
+            "stable-diffusion": self._generate_stable_diffusion,
+            "comfyui": self._generate_comfyui,
+            "fallback": self._generate_fallback,
+        }
     
     def _setup_logger(self) -> logging.Logger:
         logger = logging.getLogger("ImageGenerator")
         logger.setLevel(logging.INFO)
         return logger
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def session(self):
+        """HTTP session shared across calls (and batch workers) so connections are kept alive"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+    
+    def _create_session(self):
+        """Build a pooled session that retries requests that never reached the server"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Every generation call is a POST. A gateway error or read timeout
+        # does not mean the backend dropped the request, and retrying could
+        # start the same render again, so only failed connects are retried
+        # (urllib3 does that for any method); status retries are GET-only
+        retry = Retry(
+            total=3,
+            read=0,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=retry
+        )
+        
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        if self._session is not None:
+            self._session.close()
+    
     def generate_image(
         self, 
         prompt: str, 
@@ -63,25 +244,52 @@ class ImageGenerator:
         """
         self.logger.info(f"Generating image with prompt: {prompt[:100]}...")
         
+        generate = self._dispatch.get(self.backend)
+        if generate is None:
+            return False, f"Unknown backend: {self.backend}"
+        
+        # A near-identical earlier prompt can be reused outright
+        cached_path, similarity = None, 0.0
+        if self.prompt_cache is not None and self.backend != "fallback":
+            cached_path, similarity = self.prompt_cache.lookup(
+                prompt, width, height, negative_prompt, self.backend, self.model
+            )
+            if cached_path and similarity >= self.prompt_cache.REUSE_SIMILARITY:
+                self.logger.info(f"Reusing cached image {cached_path} (similarity {similarity:.2f})")
+                try:
+                    # Copied, not linked, so the output never shares the cache's file
+                    self._link_or_copy(Path(cached_path), Path(output_path), link=False)
+                    return True, None
+                except OSError as e:
+                    self.logger.warning(f"Could not reuse cached image, generating: {e}")
+        
         try:
-            if self.backend == "ollama":
-                return self._generate_ollama(
-                    prompt, output_path, width, height
+            success, error = False, None
+            
+            # A merely similar one can seed a shorter img2img run
+            if (
+                cached_path
+                and self.backend == "stable-diffusion"
+                and similarity >= self.prompt_cache.REFINE_SIMILARITY
+            ):
+                success, error = self._refine_stable_diffusion(
+                    cached_path, similarity, prompt, output_path, width, height, negative_prompt
                 )
-            elif self.backend == "stable-diffusion":
-                return self._generate_stable_diffusion(
-                    prompt, output_path, width, height, negative_prompt
+                if not success:
+                    self.logger.warning(f"Refining cached image failed, generating from scratch: {error}")
+            
+            if not success:
+                success, error = generate(
+                    prompt, output_path, width, height,
+                    negative_prompt=negative_prompt,
+                    fallback_asset=fallback_asset
                 )
-            elif self.backend == "comfyui":
-                return self._generate_comfyui(
-                    prompt, output_path, width, height
+            
+            if success and self.prompt_cache is not None and self.backend != "fallback":
+                self.prompt_cache.add(
+                    prompt, width, height, output_path, negative_prompt, self.backend, self.model
                 )
-            elif self.backend == "fallback":
-                if fallback_asset:
-                    return self._use_fallback(fallback_asset, output_path)
-                return False, "Fallback backend selected but no fallback asset provided"
-            else:
-                return False, f"Unknown backend: {self.backend}"
+            return success, error
         
         except Exception as e:
             self.logger.error(f"Generation failed: {e}")
@@ -92,14 +300,154 @@ class ImageGenerator:
             
             return False, str(e)
     
+    async def agenerate_image(
+        self,
+        prompt: str,
+        output_path: str,
+        width: int = 1280,
+        height: int = 720,
+        negative_prompt: Optional[str] = None,
+        fallback_asset: Optional[str] = None
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Async variant of generate_image()
+        
+        Runs the blocking request and file write in a worker thread, sharing
+        this generator's pooled session, so several generations can be
+        awaited together with asyncio.gather().
+        
+        Returns:
+            (success, error_message)
+        """
+        import asyncio
+        
+        return await asyncio.to_thread(
+            self.generate_image,
+            prompt,
+            output_path,
+            width,
+            height,
+            negative_prompt,
+            fallback_asset
+        )
+    
+    def generate_batch(
+        self,
+        jobs: list[Dict],
+        max_workers: int = 4
+    ) -> list[tuple[bool, Optional[str]]]:
+        """
+        Generate several images concurrently
+        
+        Args:
+            jobs: List of keyword argument dicts for generate_image()
+            max_workers: Maximum number of generations in flight
+            
+        Returns:
+            List of (success, error_message), in the same order as jobs
+        """
+        results: list[tuple[bool, Optional[str]]] = [(False, "Not started")] * len(jobs)
+        if not jobs:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.generate_image, **job): index
+                for index, job in enumerate(jobs)
+            }
+            
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = (False, str(e))
+                
+                if not results[index][0]:
+                    self.logger.warning(f"Batch job {index + 1}/{len(jobs)} failed: {results[index][1]}")
+        
+        return results
+    
+    def generate_images_batch(
+        self,
+        prompts: list[str],
+        output_paths: list[str],
+        width: int = 1280,
+        height: int = 720,
+        negative_prompt: Optional[str] = None,
+        max_batch_size: int = 4
+    ) -> list[tuple[bool, Optional[str]]]:
+        """
+        Generate one image per prompt, sharing SD WebUI calls where possible
+        
+        With the Stable Diffusion backend, identical prompts are rendered
+        together in a single txt2img call using batch_size; other backends
+        fall back to generate_batch().
+        
+        Args:
+            prompts: Text prompts, one per image
+            output_paths: Where to save each image
+            width: Image width
+            height: Image height
+            negative_prompt: What to avoid in the images
+            max_batch_size: Most images rendered by one SD call (bounded by VRAM)
+            
+        Returns:
+            List of (success, error_message), in the same order as prompts
+        """
+        if len(prompts) != len(output_paths):
+            raise ValueError("prompts and output_paths must have the same length")
+        
+        if self.backend != "stable-diffusion":
+            return self.generate_batch([
+                {
+                    "prompt": prompt,
+                    "output_path": output_path,
+                    "width": width,
+                    "height": height,
+                    "negative_prompt": negative_prompt
+                }
+                for prompt, output_path in zip(prompts, output_paths)
+            ])
+        
+        # Group identical prompts; SD WebUI takes one prompt per call
+        groups: Dict[str, list[int]] = {}
+        for index, prompt in enumerate(prompts):
+            groups.setdefault(prompt, []).append(index)
+        
+        results: list[tuple[bool, Optional[str]]] = [(False, "Not started")] * len(prompts)
+        for prompt, indices in groups.items():
+            for start in range(0, len(indices), max_batch_size):
+                chunk = indices[start:start + max_batch_size]
+                paths = [output_paths[index] for index in chunk]
+                
+                if len(chunk) == 1:
+                    chunk_results = [self.generate_image(prompt, paths[0], width, height, negative_prompt)]
+                else:
+                    payload = self._stable_diffusion_payload(prompt, width, height, negative_prompt)
+                    payload["batch_size"] = len(chunk)
+                    chunk_results = self._call_stable_diffusion_batch(payload, paths)
+                
+                for index, result in zip(chunk, chunk_results):
+                    results[index] = result
+                    if not result[0]:
+                        self.logger.warning(f"Batch image {index + 1}/{len(prompts)} failed: {result[1]}")
+        
+        return results
+    
     def _generate_ollama(
         self,
         prompt: str,
         output_path: str,
         width: int,
-        height: int
+        height: int,
+        *,
+        negative_prompt: Optional[str] = None,
+        fallback_asset: Optional[str] = None
     ) -> tuple[bool, Optional[str]]:
         """Generate using Ollama image generation models"""
+        import requests
+        
         try:
             if not self.model:
                 return False, "Model name required for Ollama backend (e.g., 'x/z-image-turbo')"
@@ -133,7 +481,7 @@ class ImageGenerator:
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json=payload,
                 timeout=300
@@ -142,21 +490,20 @@ class ImageGenerator:
             if response.status_code != 200:
                 return False, f"Ollama API error: {response.status_code} - {response.text[:200]}"
             
-            result = response.json()
+            result = _json_loads(response.content)
             
             # Try different response formats that Ollama might use:
             # 1. "image" field (single image, base64)
             if "image" in result and result["image"]:
                 try:
                     image_b64 = result["image"]
-                    image_data = base64.b64decode(image_b64)
+                    image_data = _b64decode(image_b64)
                     
                     # Verify we got actual image data
                     if len(image_data) < 100:
                         return False, f"Invalid image data received (only {len(image_data)} bytes)"
                     
-                    with open(output_path, 'wb') as f:
-                        f.write(image_data)
+                    _replace_file(output_path, image_data)
                     
                     self.logger.info(f"Image generated successfully via Ollama: {output_path} ({len(image_data)} bytes)")
                     return True, None
@@ -168,14 +515,13 @@ class ImageGenerator:
             if "images" in result and result["images"]:
                 try:
                     image_b64 = result["images"][0]
-                    image_data = base64.b64decode(image_b64)
+                    image_data = _b64decode(image_b64)
                     
                     # Verify we got actual image data
                     if len(image_data) < 100:
                         return False, f"Invalid image data received (only {len(image_data)} bytes)"
                     
-                    with open(output_path, 'wb') as f:
-                        f.write(image_data)
+                    _replace_file(output_path, image_data)
                     
                     self.logger.info(f"Image generated successfully via Ollama: {output_path} ({len(image_data)} bytes)")
                     return True, None
@@ -187,13 +533,12 @@ class ImageGenerator:
             if "response" in result and result["response"]:
                 try:
                     # Try to decode as base64
-                    image_data = base64.b64decode(result["response"])
+                    image_data = _b64decode(result["response"])
                     
                     if len(image_data) < 100:
                         return False, f"Invalid image data in response (only {len(image_data)} bytes)"
                     
-                    with open(output_path, 'wb') as f:
-                        f.write(image_data)
+                    _replace_file(output_path, image_data)
                     
                     self.logger.info(f"Image generated successfully via Ollama: {output_path}")
                     return True, None
@@ -216,91 +561,268 @@ class ImageGenerator:
         output_path: str,
         width: int,
         height: int,
-        negative_prompt: Optional[str]
+        *,
+        negative_prompt: Optional[str] = None,
+        fallback_asset: Optional[str] = None
     ) -> tuple[bool, Optional[str]]:
         """Generate using Stable Diffusion WebUI API"""
+        payload = self._stable_diffusion_payload(prompt, width, height, negative_prompt)
+        if self.cache_dir is None:
+            return self._call_stable_diffusion("txt2img", payload, output_path)
+        
+        # Identical requests get the same key and, via a seed derived from
+        # it, the same image, so a cached result is an exact reuse
+        import hashlib
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        payload["seed"] = int(key[:8], 16)
+        cached_path = self.cache_dir / f"{key}.png"
+        
+        if not cached_path.is_file():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            success, error = self._call_stable_diffusion("txt2img", payload, str(cached_path))
+            if not success:
+                return False, error
+        else:
+            self.logger.info(f"Using cached image for identical request: {cached_path}")
+        
         try:
-            # Default negative prompt for church-appropriate content
-            if negative_prompt is None:
-                negative_prompt = "nsfw, gore, violence, disturbing, inappropriate, offensive, low quality, blurry"
-            
-            payload = {
-                "prompt": prompt,
-                "negative_prompt": negative_prompt,
-                "width": width,
-                "height": height,
-                "steps": 20,
-                "cfg_scale": 7,
-                "sampler_name": "Euler a",
-                "batch_size": 1,
-                "n_iter": 1,
+            # Copied, not linked, so nothing written to output_path later can
+            # reach the cache entry
+            self._link_or_copy(cached_path, Path(output_path), link=False)
+            return True, None
+        except Exception as e:
+            return False, f"Failed to copy cached image: {e}"
+    
+    def _refine_stable_diffusion(
+        self,
+        init_image: str,
+        similarity: float,
+        prompt: str,
+        output_path: str,
+        width: int,
+        height: int,
+        negative_prompt: Optional[str]
+    ) -> tuple[bool, Optional[str]]:
+        """Generate via img2img from a cached image; closer matches keep more of it"""
+        import base64
+        
+        payload = self._stable_diffusion_payload(prompt, width, height, negative_prompt)
+        payload["init_images"] = [base64.b64encode(Path(init_image).read_bytes()).decode("ascii")]
+        payload["denoising_strength"] = round(1 - similarity * 0.6, 2)
+        payload["steps"] = 10
+        
+        self.logger.info(f"Refining cached image {init_image} (similarity {similarity:.2f})")
+        return self._call_stable_diffusion("img2img", payload, output_path)
+    
+    def _stable_diffusion_payload(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        negative_prompt: Optional[str]
+    ) -> dict:
+        """Build the common Stable Diffusion WebUI request body"""
+        # Default negative prompt for church-appropriate content
+        if negative_prompt is None:
+            negative_prompt = "nsfw, gore, violence, disturbing, inappropriate, offensive, low quality, blurry"
+        
+        payload = {
+            "prompt": prompt,
+            "negative_prompt": negative_prompt,
+            "width": width,
+            "height": height,
+            "steps": 20,
+            "cfg_scale": 7,
+            "sampler_name": "Euler a",
+            "batch_size": 1,
+            "n_iter": 1,
+        }
+        
+        if self.model:
+            payload["override_settings"] = {
+                "sd_model_checkpoint": self.model
             }
+        
+        return payload
+    
+    def _call_stable_diffusion(
+        self,
+        endpoint: str,
+        payload: dict,
+        output_path: str
+    ) -> tuple[bool, Optional[str]]:
+        """POST to a Stable Diffusion WebUI endpoint and save the first image"""
+        import requests
+        
+        try:
+            self.logger.info(f"Calling Stable Diffusion API at {self.base_url}/sdapi/v1/{endpoint}")
             
-            if self.model:
-                payload["override_settings"] = {
-                    "sd_model_checkpoint": self.model
-                }
+            response = self.session.post(
+                f"{self.base_url}/sdapi/v1/{endpoint}",
+                json=payload,
+                stream=True,
+                timeout=300
+            )
             
-            self.logger.info(f"Calling Stable Diffusion API at {self.base_url}/sdapi/v1/txt2img")
+            with response:
+                if response.status_code != 200:
+                    return False, f"API error: {response.status_code} - {response.text[:200]}"
+                
+                content_length = response.headers.get("Content-Length")
+                if content_length and int(content_length) <= self.STREAM_THRESHOLD:
+                    result = _json_loads(response.content)
+                    if not result.get("images"):
+                        return False, "No image in response"
+                    
+                    _replace_file(output_path, _b64decode(result["images"][0]))
+                else:
+                    # Decode the base64 image straight to disk as it arrives
+                    partial_path = f"{output_path}.part"
+                    try:
+                        with open(partial_path, 'wb') as f:
+                            written = _write_first_image(
+                                response.iter_content(self.STREAM_CHUNK_SIZE), f
+                            )
+                        if not written:
+                            return False, "No image in response"
+                        os.replace(partial_path, output_path)
+                    finally:
+                        Path(partial_path).unlink(missing_ok=True)
+            
+            self.logger.info(f"Image generated successfully: {output_path}")
+            return True, None
             
-            response = requests.post(
+        except requests.exceptions.ConnectionError:
+            return False, "Cannot connect to Stable Diffusion API. Is it running?"
+        except requests.exceptions.Timeout:
+            return False, "Request timeout (>5 minutes)"
+        except Exception as e:
+            return False, f"Stable Diffusion error: {str(e)}"
+    
+    def _call_stable_diffusion_batch(
+        self,
+        payload: dict,
+        output_paths: list[str]
+    ) -> list[tuple[bool, Optional[str]]]:
+        """Run one batched txt2img call and save its images in order"""
+        import requests
+        
+        try:
+            self.logger.info(f"Calling Stable Diffusion API at {self.base_url}/sdapi/v1/txt2img (batch of {len(output_paths)})")
+            
+            response = self.session.post(
                 f"{self.base_url}/sdapi/v1/txt2img",
                 json=payload,
-                timeout=300
+                timeout=300 * len(output_paths)
             )
             
             if response.status_code != 200:
-                return False, f"API error: {response.status_code} - {response.text[:200]}"
+                error = f"API error: {response.status_code} - {response.text[:200]}"
+                return [(False, error)] * len(output_paths)
             
-            result = response.json()
+            images = _json_loads(response.content).get("images") or []
             
-            if "images" in result and result["images"]:
-                # Decode base64 image
-                image_data = base64.b64decode(result["images"][0])
-                
-                # Save to file
-                with open(output_path, 'wb') as f:
-                    f.write(image_data)
-                
+            # WebUI may prepend a grid of the whole batch
+            if len(images) == len(output_paths) + 1:
+                images = images[1:]
+            
+            results = []
+            for index, output_path in enumerate(output_paths):
+                if index >= len(images):
+                    results.append((False, "No image in response"))
+                    continue
+                _replace_file(output_path, _b64decode(images[index]))
                 self.logger.info(f"Image generated successfully: {output_path}")
-                return True, None
+                results.append((True, None))
             
-            return False, "No image in response"
+            return results
             
         except requests.exceptions.ConnectionError:
-            return False, "Cannot connect to Stable Diffusion API. Is it running?"
+            error = "Cannot connect to Stable Diffusion API. Is it running?"
         except requests.exceptions.Timeout:
-            return False, "Request timeout (>5 minutes)"
+            error = "Request timeout"
         except Exception as e:
-            return False, f"Stable Diffusion error: {str(e)}"
+            error = f"Stable Diffusion error: {str(e)}"
+        return [(False, error)] * len(output_paths)
     
     def _generate_comfyui(
         self,
         prompt: str,
         output_path: str,
         width: int,
-        height: int
+        height: int,
+        *,
+        negative_prompt: Optional[str] = None,
+        fallback_asset: Optional[str] = None
     ) -> tuple[bool, Optional[str]]:
         """Generate using ComfyUI API"""
         # ComfyUI implementation would go here
         # This requires a more complex workflow JSON
         return False, "ComfyUI backend not yet implemented"
     
+    def _generate_fallback(
+        self,
+        prompt: str,
+        output_path: str,
+        width: int,
+        height: int,
+        *,
+        negative_prompt: Optional[str] = None,
+        fallback_asset: Optional[str] = None
+    ) -> tuple[bool, Optional[str]]:
+        """Use the fallback asset as the generated image"""
+        if not fallback_asset:
+            return False, "Fallback backend selected but no fallback asset provided"
+        return self._use_fallback(fallback_asset, output_path)
+    
     def _use_fallback(self, fallback_asset: str, output_path: str) -> tuple[bool, Optional[str]]:
-        """Copy fallback asset to output path"""
+        """
+        Link (or copy) fallback asset to output path
+        
+        The output may share its file with the asset, so it must be replaced
+        rather than modified in place; this module's writers all go through
+        _replace_file() or os.replace().
+        """
         try:
-            from shutil import copy2
             fallback_path = Path(fallback_asset)
             
             if not fallback_path.exists():
                 return False, f"Fallback asset not found: {fallback_asset}"
             
-            copy2(fallback_asset, output_path)
+            self._link_or_copy(fallback_path, Path(output_path))
             self.logger.info(f"Used fallback asset: {fallback_asset}")
             return True, None
         except Exception as e:
             return False, f"Failed to use fallback: {e}"
     
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path, link: bool = True):
+        """
+        Hard-link source to target, copying when linking is not possible
+        (or when link is False)
+        
+        The link (or copy) is made under a temporary name and renamed over
+        target, so readers never see a missing or partial file.
+        """
+        if source.resolve() == target.resolve():
+            return
+        
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            if link:
+                try:
+                    os.link(source, temp_path)
+                except (OSError, NotImplementedError):
+                    # Different filesystem, or links unsupported
+                    link = False
+            if not link:
+                from shutil import copy2
+                copy2(source, temp_path)
+            os.replace(temp_path, target)
+        finally:
+            temp_path.unlink(missing_ok=True)
+    
     def unload_model(self) -> bool:
         """Unload the image model from Ollama memory"""
         if self.backend != "ollama" or not self.model:
@@ -309,7 +831,7 @@ class ImageGenerator:
         try:
             self.logger.info(f"Unloading Ollama image model {self.model} from memory")
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model,
@@ -2,10 +2,44 @@
 Thumbnail Composer (Pillow) - Compose final thumbnail from layers
 """
 
+import hashlib
+import json
 import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
-from PIL import Image, ImageDraw, ImageFont
+from typing import TYPE_CHECKING, Optional, Tuple
+
+# Pillow is imported where it is used, so importing this module (e.g. just
+# to list system fonts) does not pay for it
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw, ImageFont
+
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc', '.dfont')
+
+
+@lru_cache(maxsize=256)
+def _truetype_cached(font_path: str, size: int) -> "ImageFont.FreeTypeFont":
+    """Load a TrueType font once per (path, size); font objects are read-only"""
+    from PIL import ImageFont
+    return ImageFont.truetype(font_path, size)
+
+
+# The active Pillow build is logged by the first composer only
+_pillow_build_logged = False
+
+
+def _is_pillow_simd() -> bool:
+    """Whether the installed PIL package comes from the Pillow-SIMD distribution"""
+    from importlib import metadata
+    try:
+        metadata.distribution("pillow-simd")
+    except metadata.PackageNotFoundError:
+        return False
+    return True
 
 
 class ThumbnailComposer:
@@ -13,19 +47,60 @@ class ThumbnailComposer:
     
     DEFAULT_SIZE = (1280, 720)
     
-    def __init__(self, assets_dir: str = "assets"):
+    # Large backgrounds are pre-shrunk (JPEG draft decode, then box reduce) to
+    # this multiple of the canvas size before the final Lanczos resize
+    BACKGROUND_REDUCING_GAP = 2.0
+    
+    # Composed background/logo/pastor/meeting layers kept for reuse (~2.7 MB each at 1280x720)
+    STATIC_LAYER_CACHE_SIZE = 8
+    _static_layers: "OrderedDict[str, Image.Image]" = OrderedDict()
+    _static_layers_lock = threading.Lock()
+    
+    # Rendered title/subtitle masks (cropped, per stroke and fill) for repeated titles
+    TEXT_OVERLAY_CACHE_SIZE = 32
+    _text_overlays: "OrderedDict[str, list]" = OrderedDict()
+    _text_overlays_lock = threading.Lock()
+    
+    # Asset backgrounds already resized to the canvas, stored as lossless WebP
+    BACKGROUND_CACHE_DIR = Path.home() / ".cache" / "cmediaauto" / "backgrounds"
+    
+    # Scan results of get_system_fonts(), reused while the font folders are unchanged
+    SYSTEM_FONTS_CACHE = Path.home() / ".cache" / "cmediaauto" / "system_fonts.json"
+    
+    def __init__(self, assets_dir: str = "assets", high_quality_small_images: bool = False):
         """
         Initialize thumbnail composer
         
         Args:
             assets_dir: Path to assets directory
+            high_quality_small_images: Resize logo and pastor images with LANCZOS
+                instead of BILINEAR (slower, rarely visible at their size)
         """
+        import PIL
+        from PIL import Image, ImageDraw, features
+        
         self.assets_dir = Path(assets_dir)
+        self.small_image_resample = (
+            Image.Resampling.LANCZOS if high_quality_small_images else Image.Resampling.BILINEAR
+        )
         self.logger = self._setup_logger()
+        # First loadable font from the Chinese-capable list ("" if none)
+        self._chinese_font_path: Optional[str] = None
+        # Scratch surface for measuring text before a canvas exists
+        self._measure_draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        
+        global _pillow_build_logged
+        if not _pillow_build_logged:
+            _pillow_build_logged = True
+            build = "SIMD build" if _is_pillow_simd() else "standard build"
+            jpeg = "libjpeg-turbo" if features.check_feature("libjpeg_turbo") else "libjpeg"
+            self.logger.debug(f"Pillow {PIL.__version__} ({build}, {jpeg})")
     
     def _setup_logger(self) -> logging.Logger:
         logger = logging.getLogger("ThumbnailComposer")
-        logger.setLevel(logging.INFO)
+        # Keep a level the application set, e.g. DEBUG for the Pillow build line
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
         return logger
     
     def compose(
@@ -50,7 +125,8 @@ class ThumbnailComposer:
         title_position: dict = None,
         subtitle_position: dict = None,
         meeting_position: dict = None,
-        size: Tuple[int, int] = DEFAULT_SIZE
+        size: Tuple[int, int] = DEFAULT_SIZE,
+        quality: int = 90
     ) -> tuple[bool, Optional[str]]:
         """
         Compose thumbnail from layers with flexible element configuration
@@ -72,6 +148,7 @@ class ThumbnailComposer:
             logo_size: Logo size dict with 'width' and 'height' (defaults: 200x200)
             pastor_size: Pastor image size dict with 'width' and 'height' (defaults: 250x250)
             size: Output image size (width, height)
+            quality: JPEG quality (raise toward 95 for near-lossless text edges)
             
         Returns:
             (success, error_message)
@@ -98,157 +175,392 @@ class ThumbnailComposer:
             if meeting_position is None:
                 meeting_position = {'align': 'top-right', 'padding': 40}
             
-            # Create base canvas
-            canvas = Image.new('RGB', size, color=(255, 255, 255))
+            # Layers 1-3 and the meeting type rarely change between thumbnails,
+            # so they are composed once and reused from a cache
+            canvas = self._get_static_layer(
+                background=background,
+                logo=logo,
+                pastor_image=pastor_image,
+                meeting_type=meeting_type,
+                meeting_font_size=meeting_font_size,
+                meeting_font_path=meeting_font_path,
+                logo_size=logo_size,
+                pastor_size=pastor_size,
+                logo_position=logo_position,
+                pastor_position=pastor_position,
+                meeting_position=meeting_position,
+                size=size
+            )
             
-            # Layer 1: Background
-            if background and Path(background).exists():
-                bg = Image.open(background)
-                bg = bg.resize(size, Image.Resampling.LANCZOS)
-                canvas.paste(bg, (0, 0))
-            else:
-                # Use solid color as fallback
-                canvas = Image.new('RGB', size, color=(41, 98, 255))
+            # Layer 4: Text overlays (rendered once per title/subtitle and style)
+            if title:
+                text_overlay = self._get_text_overlay(
+                    title=title,
+                    subtitle=subtitle,
+                    title_font_size=title_font_size,
+                    subtitle_font_size=subtitle_font_size,
+                    title_font_path=title_font_path,
+                    subtitle_font_path=subtitle_font_path,
+                    title_position=title_position,
+                    subtitle_position=subtitle_position,
+                    size=size
+                )
+                for offset, color, mask in text_overlay:
+                    canvas.paste(color, offset, mask)
+            
+            # Save final thumbnail
+            canvas.save(
+                output_path,
+                'JPEG',
+                quality=quality,
+                subsampling=2,  # 4:2:0
+                optimize=False,
+                progressive=False
+            )
+            self.logger.info(f"Thumbnail saved: {output_path}")
+            
+            return True, None
+        
+        except Exception as e:
+            self.logger.error(f"Failed to compose thumbnail: {e}")
+            return False, str(e)
+    
+    def _get_text_overlay(self, **text_args) -> list:
+        """
+        Return the title/subtitle overlay as (offset, color, mask) paste steps
+        
+        Rendering (shaping, wrapping, stroking) is cached per text, fonts,
+        sizes and positions; the masks are read-only, so no copy is made.
+        """
+        key = self._layer_key(('title_font_path', 'subtitle_font_path'), **text_args)
+        with self._text_overlays_lock:
+            cached = self._text_overlays.get(key)
+            if cached is not None:
+                self._text_overlays.move_to_end(key)
+                return cached
+        
+        cached = self._compose_text_overlay(**text_args)
+        with self._text_overlays_lock:
+            self._text_overlays[key] = cached
+            while len(self._text_overlays) > self.TEXT_OVERLAY_CACHE_SIZE:
+                self._text_overlays.popitem(last=False)
+        return cached
+    
+    def _compose_text_overlay(self, size: Tuple[int, int], **layout_args) -> list:
+        """
+        Render title and subtitle as stroke and fill masks, cropped to the text
+        
+        Pasting the colors through the masks in order repeats exactly what
+        drawing the texts onto the canvas does (stroke, then fill, title
+        before subtitle), so the result is identical also where they overlap.
+        
+        Returns:
+            List of ((x, y), color, mask) to paste in order
+        """
+        from PIL import Image, ImageDraw
+        
+        steps = []
+        for text, font, position, stroke_width in self._layout_text(size=size, **layout_args):
+            # Stroke mask: the outline covers the glyphs, so filling them too
+            # does not change it. Fill mask: a zero-ink stroke leaves only the
+            # glyphs, positioned exactly as draw.text positions them
+            for color, stroke_ink in (((0, 0, 0), 255), ((255, 255, 255), 0)):
+                mask = Image.new('L', size, 0)
+                self._draw_text_with_stroke(
+                    ImageDraw.Draw(mask),
+                    position,
+                    text,
+                    font,
+                    fill_color=255,
+                    stroke_color=stroke_ink,
+                    stroke_width=stroke_width,
+                    multiline=True
+                )
+                bbox = mask.getbbox()
+                if bbox is not None:
+                    steps.append((bbox[:2], color, mask.crop(bbox)))
+        return steps
+    
+    def _layout_text(
+        self,
+        title: str,
+        subtitle: Optional[str],
+        title_font_size: int,
+        subtitle_font_size: int,
+        title_font_path: Optional[str],
+        subtitle_font_path: Optional[str],
+        title_position: dict,
+        subtitle_position: dict,
+        size: Tuple[int, int]
+    ) -> list:
+        """
+        Wrap and place the title and subtitle
+        
+        Returns:
+            List of (wrapped_text, font, (x, y), stroke_width) in drawing order
+        """
+        from PIL import Image, ImageDraw
+        
+        draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+        
+        # Calculate available text area (avoiding logo and pastor image areas)
+        text_left_margin = 50
+        text_right_margin = 50
+        text_max_width = size[0] - text_left_margin - text_right_margin
+        
+        # Title
+        title_font = self._load_font_auto_adjust(
+            title,
+            title_font_size,
+            text_max_width - 100,
+            font_path=title_font_path
+        )
+        
+        wrapped_title = self._wrap_text(title, title_font, text_max_width - 100)
+        
+        title_bbox = draw.multiline_textbbox((0, 0), wrapped_title, font=title_font)
+        title_width = title_bbox[2] - title_bbox[0]
+        title_height = title_bbox[3] - title_bbox[1]
+        
+        # Calculate position using configurable settings
+        title_x, title_y = self._calculate_position(title_position, title_width, title_height, size)
+        texts = [(wrapped_title, title_font, (title_x, title_y), 4)]
+        
+        # Subtitle
+        if subtitle:
+            subtitle_font = self._load_font_auto_adjust(
+                subtitle,
+                subtitle_font_size,
+                text_max_width - 100,
+                font_path=subtitle_font_path
+            )
+            wrapped_subtitle = self._wrap_text(subtitle, subtitle_font, text_max_width - 100)
+            subtitle_bbox = draw.multiline_textbbox((0, 0), wrapped_subtitle, font=subtitle_font)
+            subtitle_width = subtitle_bbox[2] - subtitle_bbox[0]
+            subtitle_height = subtitle_bbox[3] - subtitle_bbox[1]
             
-            # Layer 2: Logo (top-left corner)
-            if logo and Path(logo).exists():
-                logo_img = Image.open(logo)
+            # Calculate position using configurable settings
+            subtitle_x, subtitle_y = self._calculate_position(subtitle_position, subtitle_width, subtitle_height, size)
+            texts.append((wrapped_subtitle, subtitle_font, (subtitle_x, subtitle_y), 3))
+        
+        return texts
+    
+    def _get_static_layer(self, **layer_args) -> "Image.Image":
+        """
+        Return a copy of the background, logo, pastor and meeting type layers
+        
+        Composed layers are cached per source files (by mtime), sizes,
+        positions and meeting text, so recurring thumbnails only redraw
+        their title and subtitle.
+        """
+        key = self._layer_key(('background', 'logo', 'pastor_image', 'meeting_font_path'), **layer_args)
+        with self._static_layers_lock:
+            layer = self._static_layers.get(key)
+            if layer is not None:
+                self._static_layers.move_to_end(key)
+        
+        if layer is None:
+            layer = self._compose_static_layer(**layer_args)
+            with self._static_layers_lock:
+                self._static_layers[key] = layer
+                while len(self._static_layers) > self.STATIC_LAYER_CACHE_SIZE:
+                    self._static_layers.popitem(last=False)
+        
+        return layer.copy()
+    
+    def _load_background(self, background: str, size: Tuple[int, int]) -> "Image.Image":
+        """Background resized to the canvas; asset backgrounds are cached on disk"""
+        from PIL import Image
+        
+        cache_path = self._background_cache_path(background, size)
+        if cache_path is not None and cache_path.is_file():
+            try:
+                with Image.open(cache_path) as cached:
+                    return cached.convert('RGB')
+            except OSError as e:
+                self.logger.warning(f"Ignoring unreadable background cache {cache_path}: {e}")
+        
+        with Image.open(background) as bg:
+            # JPEGs much larger than the canvas decode at a reduced DCT
+            # scale (no-op for other formats), as Image.thumbnail() does
+            gap = self.BACKGROUND_REDUCING_GAP
+            bg.draft('RGB', (int(size[0] * gap), int(size[1] * gap)))
+            if bg.mode != 'RGB':
+                bg = bg.convert('RGB')
+            canvas = bg.resize(size, Image.Resampling.LANCZOS, reducing_gap=gap)
+        
+        if cache_path is not None:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+                canvas.save(temp_path, format='WEBP', lossless=True, method=0)
+                os.replace(temp_path, cache_path)
+            except OSError as e:
+                self.logger.warning(f"Failed to cache background {background}: {e}")
+        
+        return canvas
+    
+    def _background_cache_path(self, background: str, size: Tuple[int, int]) -> Optional[Path]:
+        """
+        Disk cache file for a resized background, or None if it should not be cached
+        
+        Only backgrounds inside the assets directory are cached: they are
+        reused across events, while generated backgrounds are used once.
+        """
+        from PIL import features
+        
+        if not features.check_module('webp'):
+            return None
+        try:
+            path = Path(background).resolve()
+            if not path.is_relative_to(self.assets_dir.resolve()):
+                return None
+            stat = path.stat()
+        except OSError:
+            return None
+        
+        key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}:{size[0]}x{size[1]}:{self.BACKGROUND_REDUCING_GAP}"
+        return self.BACKGROUND_CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.webp"
+    
+    def prebuild_background_cache(self, size: Tuple[int, int] = DEFAULT_SIZE) -> int:
+        """
+        Resize every image in assets/backgrounds into the background cache
+        
+        Returns:
+            Number of backgrounds now cached
+        """
+        backgrounds_dir = self.assets_dir / "backgrounds"
+        if not backgrounds_dir.is_dir():
+            return 0
+        
+        cached = 0
+        for path in sorted(backgrounds_dir.iterdir()):
+            if path.suffix.lower() not in ('.jpg', '.jpeg', '.png', '.webp'):
+                continue
+            try:
+                self._load_background(str(path), size)
+            except OSError as e:
+                self.logger.warning(f"Skipping background {path.name}: {e}")
+                continue
+            cache_path = self._background_cache_path(str(path), size)
+            if cache_path is not None and cache_path.is_file():
+                cached += 1
+        
+        return cached
+    
+    def _layer_key(self, file_args: Tuple[str, ...], **layer_args) -> str:
+        """Cache key for a composed layer; file arguments contribute their mtime and size"""
+        def file_signature(path):
+            if not path:
+                return None
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                return [str(path), None]
+            return [str(path), stat.st_mtime_ns, stat.st_size]
+        
+        key = dict(layer_args)
+        for name in file_args:
+            key[name] = file_signature(key[name])
+        key['assets_dir'] = str(self.assets_dir.resolve())
+        key['small_image_resample'] = int(self.small_image_resample)
+        return json.dumps(key, sort_keys=True, default=str)
+    
+    def _compose_static_layer(
+        self,
+        background: Optional[str],
+        logo: Optional[str],
+        pastor_image: Optional[str],
+        meeting_type: Optional[str],
+        meeting_font_size: int,
+        meeting_font_path: Optional[str],
+        logo_size: dict,
+        pastor_size: dict,
+        logo_position: dict,
+        pastor_position: dict,
+        meeting_position: dict,
+        size: Tuple[int, int]
+    ) -> "Image.Image":
+        """Compose background, logo, pastor portrait and meeting type onto a new canvas"""
+        from PIL import Image, ImageDraw
+        
+        # Layer 1: Background (the resized background is the base canvas)
+        if background and Path(background).exists():
+            canvas = self._load_background(background, size)
+        else:
+            # Use solid color as fallback
+            canvas = Image.new('RGB', size, color=(41, 98, 255))
+        
+        # Layer 2: Logo (top-left corner)
+        if logo and Path(logo).exists():
+            with Image.open(logo) as source:
                 logo_img = self._resize_with_aspect(
-                    logo_img, 
+                    source, 
                     max_width=logo_size.get('width', 200), 
-                    max_height=logo_size.get('height', 200)
-                )
-                
-                # Calculate position based on configuration
-                logo_x, logo_y = self._calculate_position(
-                    logo_position, logo_img.width, logo_img.height, size
+                    max_height=logo_size.get('height', 200),
+                    resample=self.small_image_resample
                 )
-                
-                if logo_img.mode == 'RGBA':
-                    canvas.paste(logo_img, (logo_x, logo_y), logo_img)
-                else:
-                    canvas.paste(logo_img, (logo_x, logo_y))
             
-            # Layer 3: Pastor portrait (bottom-left corner)
-            if pastor_image and Path(pastor_image).exists():
-                pastor_img = Image.open(pastor_image)
+            # Calculate position based on configuration
+            logo_x, logo_y = self._calculate_position(
+                logo_position, logo_img.width, logo_img.height, size
+            )
+            
+            if logo_img.mode == 'RGBA':
+                canvas.paste(logo_img, (logo_x, logo_y), logo_img)
+            else:
+                canvas.paste(logo_img, (logo_x, logo_y))
+        
+        # Layer 3: Pastor portrait (bottom-left corner)
+        if pastor_image and Path(pastor_image).exists():
+            with Image.open(pastor_image) as source:
                 pastor_img = self._resize_with_aspect(
-                    pastor_img, 
+                    source, 
                     max_width=pastor_size.get('width', 400), 
-                    max_height=pastor_size.get('height', 400)
-                )
-                
-                # Calculate position based on configuration
-                pastor_x, pastor_y = self._calculate_position(
-                    pastor_position, pastor_img.width, pastor_img.height, size
+                    max_height=pastor_size.get('height', 400),
+                    resample=self.small_image_resample
                 )
-                
-                if pastor_img.mode == 'RGBA':
-                    canvas.paste(pastor_img, (pastor_x, pastor_y), pastor_img)
-                else:
-                    canvas.paste(pastor_img, (pastor_x, pastor_y))
-            
-            # Layer 4: Text overlays
-            draw = ImageDraw.Draw(canvas)
             
-            # Calculate available text area (avoiding logo and pastor image areas)
-            text_left_margin = 50
-            text_right_margin = 50
-            text_max_width = size[0] - text_left_margin - text_right_margin
+            # Calculate position based on configuration
+            pastor_x, pastor_y = self._calculate_position(
+                pastor_position, pastor_img.width, pastor_img.height, size
+            )
             
-            # Draw meeting type
-            if meeting_type:
-                meeting_font = self._load_font_auto_adjust(
-                    meeting_type,
-                    meeting_font_size,
-                    300,  # max width for meeting type
-                    font_path=meeting_font_path
-                )
-                
-                meeting_bbox = draw.textbbox((0, 0), meeting_type, font=meeting_font)
-                meeting_width = meeting_bbox[2] - meeting_bbox[0]
-                meeting_height = meeting_bbox[3] - meeting_bbox[1]
-                
-                # Calculate position based on configuration
-                meeting_x, meeting_y = self._calculate_position(
-                    meeting_position, meeting_width, meeting_height, size
-                )
-                
-                self._draw_text_with_stroke(
-                    draw,
-                    (meeting_x, meeting_y),
-                    meeting_type,
-                    meeting_font,
-                    fill_color=(255, 255, 255),
-                    stroke_color=(0, 0, 0),
-                    stroke_width=3
-                )
+            if pastor_img.mode == 'RGBA':
+                canvas.paste(pastor_img, (pastor_x, pastor_y), pastor_img)
+            else:
+                canvas.paste(pastor_img, (pastor_x, pastor_y))
+        
+        # Meeting type text
+        if meeting_type:
+            draw = ImageDraw.Draw(canvas)
+            meeting_font = self._load_font_auto_adjust(
+                meeting_type,
+                meeting_font_size,
+                300,  # max width for meeting type
+                font_path=meeting_font_path
+            )
             
-            # Draw title
-            if title:
-                title_font = self._load_font_auto_adjust(
-                    title,
-                    title_font_size,
-                    text_max_width - 100,
-                    font_path=title_font_path
-                )
-                
-                wrapped_title = self._wrap_text(title, title_font, text_max_width - 100)
-                
-                title_bbox = draw.multiline_textbbox((0, 0), wrapped_title, font=title_font)
-                title_width = title_bbox[2] - title_bbox[0]
-                title_height = title_bbox[3] - title_bbox[1]
-                
-                # Calculate position using configurable settings
-                title_x, title_y = self._calculate_position(title_position, title_width, title_height, size)
-                
-                self._draw_text_with_stroke(
-                    draw,
-                    (title_x, title_y),
-                    wrapped_title,
-                    title_font,
-                    fill_color=(255, 255, 255),
-                    stroke_color=(0, 0, 0),
-                    stroke_width=4,
-                    multiline=True
-                )
-                
-                # Draw subtitle
-                if subtitle:
-                    subtitle_font = self._load_font_auto_adjust(
-                        subtitle,
-                        subtitle_font_size,
-                        text_max_width - 100,
-                        font_path=subtitle_font_path
-                    )
-                    wrapped_subtitle = self._wrap_text(subtitle, subtitle_font, text_max_width - 100)
-                    subtitle_bbox = draw.multiline_textbbox((0, 0), wrapped_subtitle, font=subtitle_font)
-                    subtitle_width = subtitle_bbox[2] - subtitle_bbox[0]
-                    subtitle_height = subtitle_bbox[3] - subtitle_bbox[1]
-                    
-                    # Calculate position using configurable settings
-                    subtitle_x, subtitle_y = self._calculate_position(subtitle_position, subtitle_width, subtitle_height, size)
-                    
-                    self._draw_text_with_stroke(
-                        draw,
-                        (subtitle_x, subtitle_y),
-                        wrapped_subtitle,
-                        subtitle_font,
-                        fill_color=(255, 255, 255),
-                        stroke_color=(0, 0, 0),
-                        stroke_width=3,
-                        multiline=True
-                    )
+            meeting_bbox = draw.textbbox((0, 0), meeting_type, font=meeting_font)
+            meeting_width = meeting_bbox[2] - meeting_bbox[0]
+            meeting_height = meeting_bbox[3] - meeting_bbox[1]
             
-            # Save final thumbnail
-            canvas.save(output_path, 'JPEG', quality=95)
-            self.logger.info(f"Thumbnail saved: {output_path}")
+            # Calculate position based on configuration
+            meeting_x, meeting_y = self._calculate_position(
+                meeting_position, meeting_width, meeting_height, size
+            )
             
-            return True, None
+            self._draw_text_with_stroke(
+                draw,
+                (meeting_x, meeting_y),
+                meeting_type,
+                meeting_font,
+                fill_color=(255, 255, 255),
+                stroke_color=(0, 0, 0),
+                stroke_width=3
+            )
         
-        except Exception as e:
-            self.logger.error(f"Failed to compose thumbnail: {e}")
-            return False, str(e)
+        return canvas
     
     def _calculate_position(
         self, 
@@ -316,17 +628,23 @@ class ThumbnailComposer:
     
     def _resize_with_aspect(
         self, 
-        image: Image.Image, 
+        image: "Image.Image", 
         max_width: int, 
-        max_height: int
-    ) -> Image.Image:
-        """Resize image maintaining aspect ratio"""
+        max_height: int,
+        resample: Optional["Image.Resampling"] = None
+    ) -> "Image.Image":
+        """Resize image maintaining aspect ratio (BILINEAR unless resample is given)"""
+        if resample is None:
+            from PIL import Image
+            resample = Image.Resampling.BILINEAR
         ratio = min(max_width / image.width, max_height / image.height)
         new_size = (int(image.width * ratio), int(image.height * ratio))
-        return image.resize(new_size, Image.Resampling.LANCZOS)
+        return image.resize(new_size, resample)
     
-    def _load_font_with_chinese_support(self, size: int) -> ImageFont.ImageFont:
+    def _load_font_with_chinese_support(self, size: int) -> "ImageFont.ImageFont":
         """Load font with Chinese character support"""
+        from PIL import ImageFont
+        
         # Font paths to try (in order of preference)
         font_paths = [
             # Custom fonts in assets
@@ -344,16 +662,24 @@ class ThumbnailComposer:
             "/System/Library/Fonts/Supplemental/Arial.ttf",
         ]
         
-        for font_path in font_paths:
-            try:
-                font = ImageFont.truetype(font_path, size)
+        # The first loadable path does not change, so probe only once
+        if self._chinese_font_path is None:
+            self._chinese_font_path = ""
+            for font_path in font_paths:
+                try:
+                    _truetype_cached(font_path, size)
+                except Exception as e:
+                    continue
+                self._chinese_font_path = font_path
                 self.logger.info(f"Loaded font: {font_path}")
-                return font
-            except Exception as e:
-                continue
+                break
+            else:
+                self.logger.warning(f"Could not load any font with Chinese support, using default")
+        
+        if self._chinese_font_path:
+            return _truetype_cached(self._chinese_font_path, size)
         
         # Final fallback
-        self.logger.warning(f"Could not load any font with Chinese support, using default")
         return ImageFont.load_default()
     
     def _load_font_auto_adjust(
@@ -363,7 +689,7 @@ class ThumbnailComposer:
         max_width: int,
         font_path: Optional[str] = None,
         min_size: int = 24
-    ) -> ImageFont.ImageFont:
+    ) -> "ImageFont.ImageFont":
         """
         Load font and automatically adjust size to fit text within max_width
         
@@ -377,42 +703,42 @@ class ThumbnailComposer:
         Returns:
             Font object with adjusted size
         """
-        current_size = initial_size
+        # Binary search for the largest size that fits
+        low, high = min_size, initial_size
+        best = None
         
-        while current_size >= min_size:
-            # Load font
-            if font_path and Path(font_path).exists():
-                try:
-                    font = ImageFont.truetype(font_path, current_size)
-                except:
-                    font = self._load_font_with_chinese_support(current_size)
-            else:
-                font = self._load_font_with_chinese_support(current_size)
+        while low <= high:
+            mid = (low + high) // 2
+            font = self._load_sized_font(mid, font_path)
             
-            # Measure text width
-            dummy_draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
-            
-            # Wrap text first
+            # Wrap text first, then measure width
             wrapped = self._wrap_text(text, font, max_width * 2)  # Allow wider for measurement
-            bbox = dummy_draw.multiline_textbbox((0, 0), wrapped, font=font)
+            bbox = self._measure_draw.multiline_textbbox((0, 0), wrapped, font=font)
             width = bbox[2] - bbox[0]
             
             # Check if fits
             if width <= max_width:
-                self.logger.info(f"Auto-adjusted font size: {current_size}px for text length {len(text)}")
-                return font
-            
-            # Reduce size
-            current_size -= 4
+                best = mid
+                low = mid + 1
+            else:
+                high = mid - 1
         
-        # Return minimum size font
+        if best is None:
+            # Return minimum size font
+            return self._load_sized_font(min_size, font_path)
+        
+        self.logger.info(f"Auto-adjusted font size: {best}px for text length {len(text)}")
+        return self._load_sized_font(best, font_path)
+    
+    def _load_sized_font(self, size: int, font_path: Optional[str] = None) -> "ImageFont.ImageFont":
+        """Load the custom font at a size, falling back to the Chinese-capable font"""
         if font_path and Path(font_path).exists():
             try:
-                return ImageFont.truetype(font_path, min_size)
+                return _truetype_cached(font_path, size)
             except:
-                return self._load_font_with_chinese_support(min_size)
+                return self._load_font_with_chinese_support(size)
         else:
-            return self._load_font_with_chinese_support(min_size)
+            return self._load_font_with_chinese_support(size)
     
     @staticmethod
     def get_system_fonts() -> list[dict]:
@@ -423,7 +749,7 @@ class ThumbnailComposer:
             List of dicts with font name and path
         """
         fonts = []
-        seen_paths = set()  # Avoid duplicates
+        seen_names = set()  # Avoid duplicates (keep first occurrence)
         
         # macOS system font directories (expanded)
         font_dirs = [
@@ -444,65 +770,107 @@ class ThumbnailComposer:
             'lantinghei', 'lantingsong', 'yuanti', 'lisong'
         ]
         
+        # Reuse the last scan if no folder it visited has changed since; adding
+        # or removing a file or subfolder changes its parent folder's mtime
+        cache_file = ThumbnailComposer.SYSTEM_FONTS_CACHE
+        roots = [os.path.abspath(font_dir) for font_dir in font_dirs if font_dir.exists()]
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+            if cached.get("roots") == roots and ThumbnailComposer._dirs_unchanged(cached["dirs"]):
+                return cached["fonts"]
+        except Exception:
+            pass
+        
+        dir_mtimes = {}
         for font_dir in font_dirs:
             if not font_dir.exists():
                 continue
             
-            # Use iterdir instead of rglob for better performance
-            try:
-                for font_file in font_dir.rglob("*"):
-                    # Skip if not a font file
-                    if font_file.suffix.lower() not in ['.ttf', '.otf', '.ttc', '.dfont']:
-                        continue
-                    
-                    # Skip duplicates
-                    font_path = str(font_file)
-                    if font_path in seen_paths:
-                        continue
-                    seen_paths.add(font_path)
-                    
-                    # Extract font name from filename
-                    font_name = font_file.stem
-                    
-                    # Remove common suffixes
-                    font_name = font_name.replace('-Regular', '').replace('Regular', '')
-                    font_name = font_name.replace('-Bold', '').replace('Bold', '')
-                    font_name = font_name.replace('-Italic', '').replace('Italic', '')
-                    
-                    # Check if supports Chinese (heuristic)
-                    name_lower = font_name.lower()
-                    path_lower = font_path.lower()
-                    chinese_support = any(keyword in name_lower or keyword in path_lower 
-                                        for keyword in chinese_keywords)
-                    
-                    fonts.append({
-                        "name": font_name,
-                        "path": font_path,
-                        "chinese_support": chinese_support
-                    })
-            except Exception as e:
-                # Skip directories with permission errors
-                continue
-        
-        # Remove duplicates by name (keep first occurrence)
-        unique_fonts = {}
-        for font in fonts:
-            if font['name'] not in unique_fonts:
-                unique_fonts[font['name']] = font
-        
-        fonts = list(unique_fonts.values())
+            for font_path in ThumbnailComposer._walk_font_files(str(font_dir), dir_mtimes):
+                # Extract font name from filename
+                font_name = os.path.splitext(os.path.basename(font_path))[0]
+                
+                # Remove common suffixes
+                font_name = font_name.replace('-Regular', '').replace('Regular', '')
+                font_name = font_name.replace('-Bold', '').replace('Bold', '')
+                font_name = font_name.replace('-Italic', '').replace('Italic', '')
+                
+                # Skip duplicates
+                if font_name in seen_names:
+                    continue
+                seen_names.add(font_name)
+                
+                # Check if supports Chinese (heuristic)
+                name_lower = font_name.lower()
+                path_lower = font_path.lower()
+                chinese_support = any(keyword in name_lower or keyword in path_lower 
+                                    for keyword in chinese_keywords)
+                
+                fonts.append({
+                    "name": font_name,
+                    "path": font_path,
+                    "chinese_support": chinese_support
+                })
         
         # Sort: Chinese-supporting fonts first, then alphabetically
         fonts.sort(key=lambda x: (not x['chinese_support'], x['name'].lower()))
         
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = cache_file.with_suffix(".tmp")
+            temp_file.write_text(
+                json.dumps({"roots": roots, "dirs": dir_mtimes, "fonts": fonts}),
+                encoding="utf-8"
+            )
+            os.replace(temp_file, cache_file)
+        except Exception:
+            pass
+        
         return fonts
     
+    @staticmethod
+    def _dirs_unchanged(dir_mtimes: dict) -> bool:
+        """Whether every folder still has the mtime recorded during a scan"""
+        try:
+            return all(os.stat(path).st_mtime_ns == mtime for path, mtime in dir_mtimes.items())
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _walk_font_files(directory: str, dir_mtimes: Optional[dict] = None):
+        """
+        Yield font file paths under directory, files before subdirectories
+        
+        Uses os.scandir so non-font entries are rejected by name alone,
+        without a stat call or Path object. Unreadable folders are skipped.
+        
+        Args:
+            dir_mtimes: If given, filled with the absolute path and mtime of
+                        every folder visited
+        """
+        subdirs = []
+        try:
+            if dir_mtimes is not None:
+                # Taken before listing, so a change during the scan is seen next time
+                dir_mtimes[os.path.abspath(directory)] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(FONT_EXTENSIONS):
+                        yield entry.path
+        except OSError:
+            return
+        
+        for subdir in subdirs:
+            yield from ThumbnailComposer._walk_font_files(subdir, dir_mtimes)
+    
     def _draw_text_with_stroke(
         self,
-        draw: ImageDraw.ImageDraw,
+        draw: "ImageDraw.ImageDraw",
         position: Tuple[int, int],
         text: str,
-        font: ImageFont.ImageFont,
+        font: "ImageFont.ImageFont",
         fill_color: Tuple[int, int, int],
         stroke_color: Tuple[int, int, int],
         stroke_width: int = 2,
@@ -520,32 +888,39 @@ class ThumbnailComposer:
         draw_method = draw.multiline_text if multiline else draw.text
         text_kwargs = {'align': 'center'} if multiline else {}
         
-        # Draw stroke
-        for offset_x in range(-stroke_width, stroke_width + 1):
-            for offset_y in range(-stroke_width, stroke_width + 1):
-                draw_method((x + offset_x, y + offset_y), text, font=font, fill=stroke_color, **text_kwargs)
-        
-        # Draw main text
-        draw_method((x, y), text, font=font, fill=fill_color, **text_kwargs)
+        # Draw text and stroke in one pass
+        draw_method(
+            (x, y),
+            text,
+            font=font,
+            fill=fill_color,
+            stroke_width=stroke_width,
+            stroke_fill=stroke_color,
+            **text_kwargs
+        )
     
-    def _wrap_text(self, text: str, font: ImageFont.ImageFont, max_width: int) -> str:
+    def _wrap_text(self, text: str, font: "ImageFont.ImageFont", max_width: int) -> str:
         """Wrap text to fit within max_width"""
-        # Simple word wrapping
+        # Simple word wrapping; each word is measured once and line widths
+        # are accumulated from word and space advances
         words = text.split()
+        space_width = font.getlength(' ')
         lines = []
         current_line = []
+        current_width = 0.0
         
         for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = font.getbbox(test_line)
-            width = bbox[2] - bbox[0]
+            word_width = font.getlength(word)
+            width = current_width + space_width + word_width if current_line else word_width
             
             if width <= max_width:
                 current_line.append(word)
+                current_width = width
             else:
                 if current_line:
                     lines.append(' '.join(current_line))
                 current_line = [word]
+                current_width = word_width
         
         if current_line:
             lines.append(' '.join(current_line))
@@ -0,0 +1,202 @@
+"""
+Prompt Cache - Reuse previously generated backgrounds for similar prompts
+Matches prompts by word overlap so recurring thumbnails skip regeneration
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class PromptCache:
+    """Remembers generated images by prompt and finds the closest match"""
+    
+    # Similarity at or above which the cached image is reused as-is
+    REUSE_SIMILARITY = 0.92
+    # Similarity at or above which the cached image seeds an img2img refinement
+    REFINE_SIMILARITY = 0.75
+    
+    # Where cached images are kept when no index file is given
+    DEFAULT_IMAGE_DIR = Path.home() / ".cache" / "cmediaauto" / "prompt_images"
+    
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        max_entries: int = 1000,
+        image_dir: Optional[str] = None
+    ):
+        """
+        Initialize prompt cache
+        
+        Args:
+            index_path: JSON file to persist entries across runs (None for memory only)
+            max_entries: Maximum number of entries; least recently used are evicted
+            image_dir: Directory for the cache's own copies of the images
+                (default: 'prompt_images' next to the index file)
+        """
+        self.index_path = Path(index_path) if index_path else None
+        self.max_entries = max_entries
+        if image_dir:
+            self.image_dir = Path(image_dir)
+        elif self.index_path:
+            self.image_dir = self.index_path.parent / "prompt_images"
+        else:
+            self.image_dir = self.DEFAULT_IMAGE_DIR
+        self.logger = self._setup_logger()
+        self._lock = threading.Lock()
+        # (prompt, width, height, negative_prompt, backend, model)
+        # -> (term vector, image path), oldest first
+        self._entries: OrderedDict[tuple, tuple[dict, str]] = OrderedDict()
+        
+        if self.index_path and self.index_path.exists():
+            self._load()
+    
+    def _setup_logger(self) -> logging.Logger:
+        logger = logging.getLogger("PromptCache")
+        logger.setLevel(logging.INFO)
+        return logger
+    
+    @staticmethod
+    def _vectorize(prompt: str) -> dict:
+        """Unit-length word count vector for a prompt"""
+        counts = Counter(re.findall(r"\w+", prompt.lower()))
+        norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+        return {word: count / norm for word, count in counts.items()}
+    
+    def lookup(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        negative_prompt: Optional[str] = None,
+        backend: str = "",
+        model: str = ""
+    ) -> tuple[Optional[str], float]:
+        """
+        Find the cached image whose prompt is most similar
+        
+        Only images generated at the same size, with the same negative prompt
+        and by the same backend and model are considered. Entries whose image
+        file has since been removed are dropped.
+        
+        Returns:
+            (image_path, cosine_similarity), or (None, 0.0) if nothing matches
+        """
+        query = self._vectorize(prompt)
+        settings = (width, height, negative_prompt, backend, model or "")
+        best_key, best_path, best_similarity = None, None, 0.0
+        
+        with self._lock:
+            stale = []
+            for key, (vector, image_path) in self._entries.items():
+                if key[1:] != settings:
+                    continue
+                
+                # Iterate the shorter vector; both are unit length
+                small, large = (query, vector) if len(query) <= len(vector) else (vector, query)
+                similarity = sum(weight * large.get(word, 0.0) for word, weight in small.items())
+                if similarity <= best_similarity:
+                    continue
+                
+                if not os.path.isfile(image_path):
+                    stale.append(key)
+                    continue
+                best_key, best_path, best_similarity = key, image_path, similarity
+            
+            for key in stale:
+                del self._entries[key]
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+        
+        return best_path, best_similarity
+    
+    def add(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        image_path: str,
+        negative_prompt: Optional[str] = None,
+        backend: str = "",
+        model: str = ""
+    ):
+        """
+        Record a generated image for a prompt and the settings it was made with
+        
+        The image is copied into image_dir, named by its content hash, so
+        later changes to image_path do not affect the cached entry.
+        """
+        try:
+            cached_path = self._store_image(Path(image_path))
+        except OSError as e:
+            self.logger.warning(f"Could not add {image_path} to prompt cache: {e}")
+            return
+        
+        key = (prompt, width, height, negative_prompt, backend, model or "")
+        with self._lock:
+            self._entries[key] = (self._vectorize(prompt), cached_path)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted_path) = self._entries.popitem(last=False)
+                if not any(path == evicted_path for _, path in self._entries.values()):
+                    Path(evicted_path).unlink(missing_ok=True)
+            
+            if self.index_path:
+                self._save()
+    
+    def _store_image(self, image_path: Path) -> str:
+        """Copy an image into image_dir under its content hash and return the copy's path"""
+        digest = hashlib.sha256(image_path.read_bytes()).hexdigest()
+        cached_path = self.image_dir / f"{digest}{image_path.suffix or '.png'}"
+        if not cached_path.is_file():
+            self.image_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = cached_path.with_name(f".{cached_path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                shutil.copyfile(image_path, temp_path)
+                os.replace(temp_path, cached_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+        return str(cached_path)
+    
+    def _load(self):
+        """Read persisted entries; vectors are rebuilt from the prompts"""
+        try:
+            entries = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable prompt cache {self.index_path}: {e}")
+            return
+        
+        for entry in entries[-self.max_entries:]:
+            key = (
+                entry["prompt"], entry["width"], entry["height"],
+                entry.get("negative_prompt"), entry.get("backend", ""), entry.get("model", "")
+            )
+            self._entries[key] = (self._vectorize(entry["prompt"]), entry["image_path"])
+    
+    def _save(self):
+        """Write entries to the index file (caller holds the lock)"""
+        entries = [
+            {
+                "prompt": prompt, "width": width, "height": height,
+                "negative_prompt": negative_prompt, "backend": backend, "model": model,
+                "image_path": image_path
+            }
+            for (prompt, width, height, negative_prompt, backend, model), (_, image_path)
+            in self._entries.items()
+        ]
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            self.logger.warning(f"Failed to save prompt cache: {e}")
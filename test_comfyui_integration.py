@@ -3,6 +3,7 @@
 Test ComfyUI Integration - Verify ComfyUI connection and image generation
 """
 
+import argparse
 import sys
 import time
 from pathlib import Path
@@ -10,7 +11,29 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from modules.thumbnail.ai_generator_comfyui import ComfyUIGenerator
+from modules.thumbnail.ai_generator_comfyui import ComfyUIGenerator, _json_loads
+
+
+TEST_PROMPT = "A beautiful church interior with warm lighting, stained glass windows, peaceful atmosphere"
+CHINESE_TEST_PROMPT = "温暖的教堂内部，彩色玻璃窗，柔和的光线，宁静的氛围，电影感"
+
+# Fixed seed so repeated runs can replay earlier images (see --no-cache)
+TEST_SEED = 20240101
+REPLAY_CACHE_DIR = Path.home() / ".cache" / "cmediaauto" / "comfyui_replay"
+
+# One generator per server so every test reuses the same keep-alive session
+_generators = {}
+_use_replay_cache = True
+
+
+def get_generator(server_url: str) -> ComfyUIGenerator:
+    """Return the shared generator for a server, creating it on first use"""
+    if server_url not in _generators:
+        _generators[server_url] = ComfyUIGenerator(
+            server_url=server_url,
+            replay_cache_dir=str(REPLAY_CACHE_DIR) if _use_replay_cache else None
+        )
+    return _generators[server_url]
 
 
 def test_server_connection(server_url: str = "http://192.168.0.114:8188"):
@@ -19,7 +42,7 @@ def test_server_connection(server_url: str = "http://192.168.0.114:8188"):
     print("Test 1: ComfyUI Server Connection")
     print("=" * 60)
     
-    generator = ComfyUIGenerator(server_url=server_url)
+    generator = get_generator(server_url)
     
     print(f"Checking server at: {server_url}")
     if generator.check_server():
@@ -52,11 +75,22 @@ def test_workflow_template():
     
     print("✓ Workflow template exists")
     
-    # Try to load it
+    # Load it the way the generator does, so the cached copy is what gets checked
     try:
-        import json
-        with open(template_path, 'r') as f:
-            workflow = json.load(f)
+        generator = ComfyUIGenerator(workflow_template_path=str(template_path))
+        try:
+            workflow = generator._get_workflow_template()
+            # The /prompt body is precompiled with placeholders; fill one in
+            body = generator._build_prompt_body(
+                prompt=CHINESE_TEST_PROMPT,
+                width=1280,
+                height=720,
+                steps=9,
+                seed=42,
+                filename_prefix="CMAS_test"
+            )
+        finally:
+            generator.close()
         
         # Check key nodes
         required_nodes = ["45", "41", "44", "9"]  # Prompt, Size, Sampler, Save
@@ -72,6 +106,17 @@ def test_workflow_template():
         print(f"  - Image size node: {workflow['41']['class_type']}")
         print(f"  - Sampler node: {workflow['44']['class_type']}")
         print(f"  - Save node: {workflow['9']['class_type']}")
+        
+        # Check the precompiled body decodes with every parameter in place
+        submitted = _json_loads(body)["prompt"]
+        if not (submitted["45"]["inputs"]["text"].startswith(CHINESE_TEST_PROMPT)
+                and submitted["41"]["inputs"]["width"] == 1280
+                and submitted["41"]["inputs"]["height"] == 720
+                and submitted["44"]["inputs"]["seed"] == 42):
+            print("✗ Precompiled prompt body does not match the parameters")
+            return False
+        
+        print(f"✓ Precompiled prompt body is valid ({len(body)} bytes)")
         return True
         
     except Exception as e:
@@ -85,7 +130,7 @@ def test_image_generation(server_url: str = "http://192.168.0.114:8188"):
     print("Test 3: Image Generation")
     print("=" * 60)
     
-    generator = ComfyUIGenerator(server_url=server_url)
+    generator = get_generator(server_url)
     
     # Create output directory
     output_dir = Path(__file__).parent / "test_output"
@@ -93,7 +138,7 @@ def test_image_generation(server_url: str = "http://192.168.0.114:8188"):
     
     output_path = output_dir / f"comfyui_test_{int(time.time())}.jpg"
     
-    test_prompt = "A beautiful church interior with warm lighting, stained glass windows, peaceful atmosphere"
+    test_prompt = TEST_PROMPT
     
     print(f"Prompt: {test_prompt[:60]}...")
     print(f"Output: {output_path}")
@@ -108,6 +153,7 @@ def test_image_generation(server_url: str = "http://192.168.0.114:8188"):
         width=1280,
         height=720,
         steps=9,
+        seed=TEST_SEED,
         timeout=120
     )
     
@@ -134,12 +180,12 @@ def test_chinese_prompt(server_url: str = "http://192.168.0.114:8188"):
     print("Test 4: Chinese Prompt Support")
     print("=" * 60)
     
-    generator = ComfyUIGenerator(server_url=server_url)
+    generator = get_generator(server_url)
     
     output_dir = Path(__file__).parent / "test_output"
     output_path = output_dir / f"comfyui_chinese_test_{int(time.time())}.jpg"
     
-    test_prompt = "温暖的教堂内部，彩色玻璃窗，柔和的光线，宁静的氛围，电影感"
+    test_prompt = CHINESE_TEST_PROMPT
     
     print(f"中文提示词: {test_prompt}")
     print(f"输出路径: {output_path}")
@@ -153,6 +199,7 @@ def test_chinese_prompt(server_url: str = "http://192.168.0.114:8188"):
         width=1280,
         height=720,
         steps=9,
+        seed=TEST_SEED,
         timeout=120
     )
     
@@ -168,15 +215,72 @@ def test_chinese_prompt(server_url: str = "http://192.168.0.114:8188"):
         return False
 
 
+def test_parallel_generation(server_url: str = "http://192.168.0.114:8188"):
+    """Tests 3 and 4 together: queue both prompts at once"""
+    print("\n" + "=" * 60)
+    print("Tests 3 & 4: Image Generation (parallel)")
+    print("=" * 60)
+    
+    generator = get_generator(server_url)
+    
+    output_dir = Path(__file__).parent / "test_output"
+    output_dir.mkdir(exist_ok=True)
+    
+    stamp = int(time.time())
+    jobs = [
+        {"prompt": TEST_PROMPT, "output_path": str(output_dir / f"comfyui_test_{stamp}.jpg")},
+        {"prompt": CHINESE_TEST_PROMPT, "output_path": str(output_dir / f"comfyui_chinese_test_{stamp}.jpg")},
+    ]
+    for job in jobs:
+        job.update(width=1280, height=720, steps=9, seed=TEST_SEED, timeout=120)
+        print(f"Prompt: {job['prompt'][:60]}")
+        print(f"Output: {job['output_path']}")
+    print("\nGenerating both images (the server renders them back to back)...\n")
+    
+    start_time = time.time()
+    results = generator.generate_batch(jobs)
+    elapsed = time.time() - start_time
+    
+    all_ok = True
+    for job, (success, error) in zip(jobs, results):
+        if success:
+            print(f"✓ Generated: {job['output_path']}")
+        else:
+            print(f"✗ Failed: {job['output_path']}")
+            print(f"  Error: {error}")
+            all_ok = False
+    print(f"\nTotal time: {elapsed:.1f}s")
+    
+    return all_ok
+
+
 def main():
     """Run all tests"""
+    parser = argparse.ArgumentParser(description='ComfyUI integration tests')
+    parser.add_argument('--server', default='http://192.168.0.114:8188', help='ComfyUI server URL')
+    parser.add_argument('--parallel', action='store_true',
+                        help='Run the generation tests together without prompting')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always generate fresh images instead of replaying earlier results')
+    args = parser.parse_args()
+    
+    global _use_replay_cache
+    _use_replay_cache = not args.no_cache
+    
     print("\n" + "=" * 60)
     print("ComfyUI Integration Test Suite")
     print("=" * 60)
     print()
     
-    server_url = "http://192.168.0.114:8188"
-    
+    try:
+        run_tests(args.server, args.parallel)
+    finally:
+        for generator in _generators.values():
+            generator.close()
+
+
+def run_tests(server_url: str, parallel: bool = False):
+    """Run the tests in order against one server"""
     # Test 1: Server connection
     if not test_server_connection(server_url):
         print("\n❌ Cannot proceed without ComfyUI server")
@@ -188,16 +292,21 @@ def main():
         print("\n❌ Workflow template validation failed")
         sys.exit(1)
     
-    # Test 3: Basic image generation
-    print("\nProceed with image generation test? (y/n): ", end="")
-    if input().lower().strip() == 'y':
-        if not test_image_generation(server_url):
-            print("\n⚠️  Basic image generation failed")
-        
-        # Test 4: Chinese prompt
-        print("\nTest Chinese prompt support? (y/n): ", end="")
+    # Tests 3 and 4: Image generation
+    if parallel:
+        if not test_parallel_generation(server_url):
+            print("\n⚠️  Image generation failed")
+    else:
+        # Test 3: Basic image generation
+        print("\nProceed with image generation test? (y/n): ", end="")
         if input().lower().strip() == 'y':
-            test_chinese_prompt(server_url)
+            if not test_image_generation(server_url):
+                print("\n⚠️  Basic image generation failed")
+            
+            # Test 4: Chinese prompt
+            print("\nTest Chinese prompt support? (y/n): ", end="")
+            if input().lower().strip() == 'y':
+                test_chinese_prompt(server_url)
     
     print("\n" + "=" * 60)
     print("Test Summary")
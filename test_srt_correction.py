@@ -120,11 +120,10 @@ def main():
         else:
             logger.error("❌ Block count mismatch!")
         
-        # Check timestamps
-        timestamps_match = all(
-            o['timestamp'] == c['timestamp']
-            for o, c in zip(original_blocks, corrected_blocks)
-        )
+        # Check timestamps (one list comparison instead of a per-block generator)
+        original_timestamps = [block['timestamp'] for block in original_blocks]
+        corrected_timestamps = [block['timestamp'] for block in corrected_blocks]
+        timestamps_match = original_timestamps == corrected_timestamps
         
         if timestamps_match:
             logger.info("✅ All timestamps preserved")
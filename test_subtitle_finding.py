@@ -5,6 +5,8 @@
 
 from pathlib import Path
 
+from modules.subtitles.find_outputs import find_subtitle_outputs, subtitle_output_candidates
+
 # 模拟输出目录
 output_dir = Path("events/2026-01-27_0016_test/output")
 input_path = "events/2026-01-27_0016_test/output/CST-405_Final_audio.wav"
@@ -26,27 +28,17 @@ for f in output_dir.iterdir():
 print()
 
 # 测试查找逻辑
-output_files = {}
-input_filename = Path(input_path).name
+output_files = find_subtitle_outputs(output_dir, input_path, base_name, formats)
+found_names = {fmt: Path(path).name for fmt, path in output_files.items()}
 
 for fmt in formats:
     print(f"查找 {fmt} 文件:")
     
-    # Try different possible output names
-    possible_names = [
-        output_dir / f"{input_filename}.{fmt}",  # audio.wav.srt
-        output_dir / f"{base_name}.{fmt}",       # audio.srt
-        output_dir / Path(input_path).name.replace(Path(input_path).suffix, f".{fmt}"),
-    ]
-    
-    for output_path in possible_names:
-        print(f"  尝试: {output_path.name} ... ", end="")
-        if output_path.exists():
-            output_files[fmt] = str(output_path)
-            print("✓ 找到了！")
+    for candidate in subtitle_output_candidates(input_path, base_name, fmt):
+        found = found_names.get(fmt) == candidate
+        print(f"  尝试: {candidate} ... {'✓ 找到了！' if found else '✗'}")
+        if found:
             break
-        else:
-            print("✗")
     
     if fmt not in output_files:
         print(f"  ⚠️  {fmt} 文件未找到")
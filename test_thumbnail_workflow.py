@@ -3,6 +3,7 @@ Test Thumbnail Generation Workflow
 Tests: Image prompt generation → AI image generation → Thumbnail composition
 """
 
+import asyncio
 import sys
 from pathlib import Path
 
@@ -48,28 +49,19 @@ backends = [
     ("stable-diffusion", "http://localhost:7860", "Requires SD WebUI running"),
 ]
 
-for backend, url, note in backends:
-    print(f"\n🎨 Testing backend: {backend}")
-    print(f"   {note}")
-    
+output_dir = Path("test_output")
+output_dir.mkdir(exist_ok=True)
+
+# Use a simple prompt for testing
+test_prompt = "A peaceful church interior with warm lighting, stained glass windows showing biblical scenes, wooden pews, and sunlight streaming through. Serene and welcoming atmosphere."
+
+
+async def probe_backend(backend, url, semaphore):
+    """Generate one test image with a backend; returns (success, error, output_file)"""
     # Set model for Ollama
     model = "x/z-image-turbo" if backend == "ollama" else None
-    
-    generator = ImageGenerator(
-        backend=backend,
-        base_url=url,
-        model=model
-    )
-    
-    output_dir = Path("test_output")
-    output_dir.mkdir(exist_ok=True)
     output_file = output_dir / f"test_bg_{backend}.png"
     
-    # Use a simple prompt for testing
-    test_prompt = "A peaceful church interior with warm lighting, stained glass windows showing biblical scenes, wooden pews, and sunlight streaming through. Serene and welcoming atmosphere."
-    
-    print(f"   Prompt: {test_prompt[:80]}...")
-    
     # For fallback, provide a fallback asset
     fallback_asset = None
     if backend == "fallback":
@@ -79,20 +71,41 @@ for backend, url, note in backends:
             if bg_files:
                 fallback_asset = str(bg_files[0])
     
-    try:
-        success, error = generator.generate_image(
-            prompt=test_prompt,
-            output_path=str(output_file),
-            fallback_asset=fallback_asset
-        )
-        
-        if success:
-            print(f"   ✅ Generated: {output_file}")
-        else:
-            print(f"   ⚠️  Failed: {error}")
-            
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
+    async with semaphore:
+        with ImageGenerator(backend=backend, base_url=url, model=model) as generator:
+            try:
+                success, error = await generator.agenerate_image(
+                    prompt=test_prompt,
+                    output_path=str(output_file),
+                    fallback_asset=fallback_asset
+                )
+            except Exception as e:
+                success, error = None, str(e)
+    
+    return success, error, output_file
+
+
+async def probe_backends():
+    """Run every backend at once; total time is the slowest backend, not the sum"""
+    semaphore = asyncio.Semaphore(3)
+    return await asyncio.gather(*[probe_backend(backend, url, semaphore) for backend, url, _ in backends])
+
+
+for backend, url, note in backends:
+    print(f"\n🎨 Testing backend: {backend}")
+    print(f"   {note}")
+print(f"\n   Prompt: {test_prompt[:80]}...")
+
+results = asyncio.run(probe_backends())
+
+for (backend, _, _), (success, error, output_file) in zip(backends, results):
+    print(f"\n🎨 {backend}:")
+    if success:
+        print(f"   ✅ Generated: {output_file}")
+    elif success is None:
+        print(f"   ❌ Error: {error}")
+    else:
+        print(f"   ⚠️  Failed: {error}")
 
 # Test 3: Thumbnail Composition
 print("\n" + "=" * 60)
@@ -103,6 +116,9 @@ from modules.thumbnail.composer_pillow import ThumbnailComposer
 
 composer = ThumbnailComposer()
 
+# Resize the asset backgrounds into the on-disk cache once; later runs reuse it
+print(f"\n🗂️  Cached asset backgrounds: {composer.prebuild_background_cache()}")
+
 # Test with fallback background
 output_dir = Path("test_output")
 output_file = output_dir / "test_thumbnail.jpg"
@@ -140,6 +156,47 @@ try:
 except Exception as e:
     print(f"   ❌ Error: {e}")
 
+# The cached title/subtitle overlay must match drawing the texts directly,
+# also where the two overlap
+print(f"\n🔤 Checking cached text overlay against direct drawing...")
+try:
+    from PIL import Image, ImageChops, ImageDraw
+    
+    size = (1280, 720)
+    base = Image.effect_noise(size, 60).convert('RGB')
+    for title_offset, subtitle_offset in ((-20, 20), (0, 0)):
+        text_args = dict(
+            title="盟約與我 Covenant",
+            subtitle="創世記 17:1-8",
+            title_font_size=96,
+            subtitle_font_size=64,
+            title_font_path=None,
+            subtitle_font_path=None,
+            title_position={"y_offset": title_offset},
+            subtitle_position={"y_offset": subtitle_offset},
+            size=size
+        )
+        
+        direct = base.copy()
+        draw = ImageDraw.Draw(direct)
+        for text, font, position, stroke_width in composer._layout_text(**text_args):
+            composer._draw_text_with_stroke(
+                draw, position, text, font, (255, 255, 255), (0, 0, 0),
+                stroke_width=stroke_width, multiline=True
+            )
+        
+        pasted = base.copy()
+        for offset, color, mask in composer._compose_text_overlay(**text_args):
+            pasted.paste(color, offset, mask)
+        
+        diff_bbox = ImageChops.difference(direct, pasted).getbbox()
+        if diff_bbox is None:
+            print(f"   ✅ Identical (y offsets {title_offset}/{subtitle_offset})")
+        else:
+            print(f"   ❌ Differs in {diff_bbox} (y offsets {title_offset}/{subtitle_offset})")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+
 # Summary
 print("\n" + "=" * 60)
 print("TEST SUMMARY")
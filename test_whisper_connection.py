@@ -2,18 +2,54 @@
 """
 测试CMAS与whisper.cpp的连接
 """
+import json
 import os
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import yaml
 
+# 优先使用 libyaml 的 C 解析器
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# 记录已验证可运行的 whisper-cli（按路径和修改时间），重复运行时跳过 --help 探测
+PROBE_CACHE = Path.home() / ".cache" / "cmediaauto" / "whisper_probe.json"
+
 def print_section(title):
     """打印分节标题"""
     print(f"\n{'='*60}")
     print(f"  {title}")
     print('='*60)
 
+def _probe_cache_key(whisper_bin):
+    """二进制文件的缓存键：路径 + 修改时间"""
+    return f"{os.path.abspath(whisper_bin)}:{os.stat(whisper_bin).st_mtime_ns}"
+
+def _load_probe_cache():
+    try:
+        return json.loads(PROBE_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _save_probe_cache(cache):
+    try:
+        PROBE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        PROBE_CACHE.write_text(json.dumps(cache), encoding="utf-8")
+    except OSError:
+        pass
+
+@lru_cache(maxsize=1)
+def _load_config(config_path="config/config.yaml"):
+    """读取并缓存 CMAS 配置（两个检查共用一次解析）"""
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
 def check_whisper_binary():
     """检查whisper.cpp二进制文件"""
     print_section("1. 检查 whisper.cpp 二进制文件")
@@ -21,8 +57,7 @@ def check_whisper_binary():
     # 从配置文件读取路径
     config_path = "config/config.yaml"
     if os.path.exists(config_path):
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = _load_config(config_path)
         whisper_bin = config['modules']['subtitles']['whispercpp']['custom_path']
         print(f"配置文件中的路径: {whisper_bin}")
     else:
@@ -32,16 +67,25 @@ def check_whisper_binary():
     if os.path.exists(whisper_bin):
         print(f"✓ 二进制文件存在: {whisper_bin}")
         
-        # 测试运行
+        # 测试运行（同一个二进制只探测一次）
         try:
+            cache_key = _probe_cache_key(whisper_bin)
+            probe_cache = _load_probe_cache()
+            if probe_cache.get(cache_key):
+                print("✓ whisper-cli 可以正常运行 (缓存)")
+                return True, whisper_bin
+            
+            # 只需要返回码，帮助文本直接丢弃
             result = subprocess.run(
                 [whisper_bin, '--help'],
-                capture_output=True,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 timeout=5
             )
             if result.returncode == 0:
                 print("✓ whisper-cli 可以正常运行")
+                probe_cache[cache_key] = True
+                _save_probe_cache(probe_cache)
                 return True, whisper_bin
             else:
                 print(f"✗ whisper-cli 运行失败 (返回码: {result.returncode})")
@@ -53,6 +97,20 @@ def check_whisper_binary():
         print(f"✗ 二进制文件不存在: {whisper_bin}")
         return False, whisper_bin
 
+def _prefetch_file(path):
+    """让操作系统把文件读入页缓存（后台执行，失败无影响）"""
+    try:
+        with open(path, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                # Linux: 交给内核异步预读
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                # macOS 等: 顺序读一遍
+                while f.read(4 * 1024 * 1024):
+                    pass
+    except OSError:
+        pass
+
 def check_whisper_models():
     """检查whisper模型文件"""
     print_section("2. 检查 Whisper 模型文件")
@@ -60,8 +118,7 @@ def check_whisper_models():
     # CMAS配置中的模型路径
     config_path = "config/config.yaml"
     if os.path.exists(config_path):
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = _load_config(config_path)
         model_path = config['modules']['subtitles']['whispercpp']['model_path']
         print(f"CMAS配置的模型路径: {model_path}")
     else:
@@ -71,6 +128,8 @@ def check_whisper_models():
     # 检查CMAS目录下是否有模型
     if os.path.exists(model_path):
         print(f"✓ CMAS模型文件存在: {model_path}")
+        # 模型有几百MB，趁后续检查运行时预读，真正加载时多半已在页缓存中
+        threading.Thread(target=_prefetch_file, args=(model_path,), daemon=True).start()
         return True, model_path
     else:
         print(f"✗ CMAS模型文件不存在: {model_path}")
@@ -83,14 +142,21 @@ def check_whisper_models():
             return False, whisper_test_model
         return False, None
 
+def _import_engine():
+    """导入 WhisperCppEngine（可在后台线程中预先执行）"""
+    # 添加modules到路径
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    from modules.subtitles.engine_whispercpp import WhisperCppEngine
+    return WhisperCppEngine
+
 def test_engine_initialization():
     """测试引擎初始化"""
     print_section("3. 测试 WhisperCppEngine 初始化")
     
     try:
-        # 添加modules到路径
-        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from modules.subtitles.engine_whispercpp import WhisperCppEngine
+        WhisperCppEngine = _import_engine()
         
         engine = WhisperCppEngine(
             model="base",
@@ -159,9 +225,12 @@ def main():
     os.chdir(script_dir)
     print(f"工作目录: {os.getcwd()}")
     
-    # 执行检查
-    binary_ok, whisper_bin = check_whisper_binary()
-    model_ok, model_path = check_whisper_models()
+    # 执行检查：引擎模块的导入较慢，在前两项检查运行时先在后台导入
+    # （检查本身按顺序执行，输出不会交错）
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(_import_engine)
+        binary_ok, whisper_bin = check_whisper_binary()
+        model_ok, model_path = check_whisper_models()
     engine_ok = test_engine_initialization()
     
     # 提供建议
@@ -2,18 +2,64 @@
 Dependency Manager - Check and install system dependencies
 """
 
+import copy
 import os
 import sys
 import platform
+import shlex
+import shutil
+import socket
 import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Leading bytes of native executables and scripts: ELF, PE, Mach-O
+# (32/64-bit, both byte orders, universal) and shebang
+EXECUTABLE_MAGIC = (
+    b'\x7fELF', b'MZ', b'#!',
+    b'\xfe\xed\xfa\xce', b'\xfe\xed\xfa\xcf',
+    b'\xce\xfa\xed\xfe', b'\xcf\xfa\xed\xfe', b'\xca\xfe\xba\xbe',
+)
+
+_yaml = None
+
+
+def _get_yaml():
+    """
+    Import yaml on first use
+    
+    Returns:
+        (yaml module, loader, dumper), preferring the libyaml C classes
+    """
+    global _yaml
+    if _yaml is None:
+        import yaml
+        _yaml = (
+            yaml,
+            getattr(yaml, 'CSafeLoader', yaml.SafeLoader),
+            getattr(yaml, 'CSafeDumper', yaml.SafeDumper),
+        )
+    return _yaml
 
 
 class DependencyManager:
     """Manages system dependencies for the Church Media Automation System"""
     
+    CONFIG_PATH = Path('config/config.yaml')
+    
+    # Seconds a version probe may take (override with CHURCH_DEPCHECK_TIMEOUT);
+    # verification right after an install allows for cold caches
+    PROBE_TIMEOUT = 1.5
+    VERIFY_TIMEOUT = 10.0
+    
+    # Install commands that can be run for the user; others are manual instructions
+    RUNNABLE_INSTALL_PREFIXES = ('brew', 'sudo', 'curl', 'git')
+    # Install command prefixes whose packages can share one invocation
+    BATCH_INSTALL_PREFIXES = ('brew install ', 'sudo apt-get install ')
+    
     DEPENDENCIES = {
         'ffmpeg': {
             'name': 'FFmpeg',
@@ -49,6 +95,7 @@ class DependencyManager:
                 'windows': 'Download from https://ollama.com/download'
             },
             'post_install': 'ollama serve',
+            'probe_port': 11434,  # 'ollama serve' listens here
             'models': ['qwen2.5:latest', 'llama3.2:latest']
         },
         'obs': {
@@ -72,6 +119,35 @@ class DependencyManager:
     def __init__(self):
         self.logger = self._setup_logger()
         self.os_type = self._detect_os()
+        self._probe_timeout = self._get_probe_timeout()
+        # DEPENDENCIES with this OS's install command and check path resolved
+        self._dep_active = {
+            dep_key: {
+                **dep,
+                'install_cmd': dep['install'].get(self.os_type),
+                'check_path_os': (dep.get('check_path') or {}).get(self.os_type),
+            }
+            for dep_key, dep in self.DEPENDENCIES.items()
+        }
+        # (dep_key, name, description, required) in DEPENDENCIES order, for check_all()
+        self._dep_iter = tuple(
+            (dep_key, dep['name'], dep['description'], dep['required'])
+            for dep_key, dep in self.DEPENDENCIES.items()
+        )
+        # (dep_key, custom_path, with_version) -> (True, version_or_path) for
+        # dependencies found installed
+        self._probe_cache: Dict[Tuple[str, Optional[str], bool], Tuple[bool, Optional[str]]] = {}
+        # (mtime_ns, parsed config) of CONFIG_PATH as last read or written
+        self._config_cache: Optional[Tuple[int, Dict]] = None
+    
+    def _get_probe_timeout(self) -> float:
+        value = os.environ.get('CHURCH_DEPCHECK_TIMEOUT')
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                self.logger.warning(f"Ignoring invalid CHURCH_DEPCHECK_TIMEOUT: {value}")
+        return self.PROBE_TIMEOUT
     
     def _setup_logger(self) -> logging.Logger:
         logger = logging.getLogger("DependencyManager")
@@ -96,18 +172,13 @@ class DependencyManager:
     
     def _load_custom_paths(self) -> Dict[str, str]:
         """Load custom paths from config file"""
-        import yaml
-        
         custom_paths = {}
-        config_path = Path('config/config.yaml')
         
         try:
-            if not config_path.exists():
+            config = self._read_config()
+            if config is None:
                 return custom_paths
             
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            
             # Load whisper.cpp custom path
             whispercpp_config = config.get('modules', {}).get('subtitles', {}).get('whispercpp', {})
             whisper_path = whispercpp_config.get('custom_path') or whispercpp_config.get('whisper_bin')
@@ -121,33 +192,131 @@ class DependencyManager:
         
         return custom_paths
     
-    def check_dependency(self, dep_key: str, custom_path: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    def _read_config(self) -> Optional[Dict]:
+        """
+        Parsed config file, reparsed only when its mtime changes
+        
+        The returned dict is shared; copy it before modifying.
+        
+        Returns:
+            Config dict, or None if the file does not exist
+        """
+        try:
+            mtime = self.CONFIG_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        
+        cached = self._config_cache
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        yaml, Loader, _ = _get_yaml()
+        with open(self.CONFIG_PATH, 'r') as f:
+            config = yaml.load(f, Loader=Loader) or {}
+        self._config_cache = (mtime, config)
+        return config
+    
+    def _write_config(self, config: Dict):
+        """Replace the config file atomically and remember what was written"""
+        yaml, _, Dumper = _get_yaml()
+        temp_path = self.CONFIG_PATH.with_name(self.CONFIG_PATH.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            yaml.dump(config, f, Dumper=Dumper, default_flow_style=False, sort_keys=False)
+        os.replace(temp_path, self.CONFIG_PATH)
+        self._config_cache = (self.CONFIG_PATH.stat().st_mtime_ns, config)
+    
+    def refresh(self):
+        """Forget cached check results so the next checks probe again"""
+        self._probe_cache.clear()
+    
+    def check_dependency(
+        self,
+        dep_key: str,
+        custom_path: Optional[str] = None,
+        with_version: bool = False
+    ) -> Tuple[bool, Optional[str]]:
         """
         Check if a dependency is installed
         
+        By default the executable is only looked up on PATH (or on disk);
+        with_version runs it to read its version, which costs a process
+        start per dependency.
+        
+        Installed results are cached for the life of this manager (see
+        refresh()); missing dependencies are probed again on every call so
+        an install made elsewhere is picked up.
+        
         Args:
             dep_key: Dependency key
             custom_path: Optional custom path to check first
+            with_version: Run the executable and report its version line
         
         Returns:
             (is_installed, version_or_path)
         """
-        dep = self.DEPENDENCIES.get(dep_key)
+        # A versioned result also answers a plain lookup
+        cached = self._probe_cache.get((dep_key, custom_path, True))
+        if cached is None and not with_version:
+            cached = self._probe_cache.get((dep_key, custom_path, False))
+        if cached is not None:
+            return cached
+        
+        if with_version:
+            result = self._probe_dependency(dep_key, custom_path)
+        else:
+            path = self._locate(dep_key, custom_path)
+            if path is None:
+                result = (False, None)
+            else:
+                result = (True, f"Custom: {path}" if path == custom_path else path)
+        
+        if result[0]:
+            self._probe_cache[(dep_key, custom_path, with_version)] = result
+        return result
+    
+    def _locate(self, dep_key: str, custom_path: Optional[str] = None) -> Optional[str]:
+        """Path of a dependency's executable (or app) without running it, or None"""
+        dep = self._dep_active.get(dep_key)
+        if not dep:
+            return None
+        
+        if custom_path and os.path.isfile(custom_path) and os.access(custom_path, os.X_OK):
+            return custom_path
+        
+        if dep.get('check_cmd'):
+            path = shutil.which(dep['check_cmd'][0])
+            if path:
+                return path
+        
+        path = dep['check_path_os']
+        if path and os.path.exists(path):
+            return path
+        
+        return None
+    
+    def _probe_dependency(
+        self,
+        dep_key: str,
+        custom_path: Optional[str],
+        timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """Run the dependency to confirm it works and read its version"""
+        timeout = timeout or self._probe_timeout
+        dep = self._dep_active.get(dep_key)
         if not dep:
             return False, None
         
         # Check custom path first
-        if custom_path and os.path.exists(custom_path):
+        if custom_path and os.path.exists(custom_path) and self._verify_executable(custom_path, timeout):
+            return True, f"Custom: {custom_path}"
+        
+        # A running daemon answers a connect() much faster than the binary starts
+        port = dep.get('probe_port')
+        if port:
             try:
-                result = subprocess.run(
-                    [custom_path, '--help'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    return True, f"Custom: {custom_path}"
-            except (FileNotFoundError, subprocess.TimeoutExpired):
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                return True, f"daemon@{port}"
+            except OSError:
                 pass
         
         # Check via command
@@ -155,25 +324,61 @@ class DependencyManager:
             try:
                 result = subprocess.run(
                     dep['check_cmd'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    timeout=timeout
                 )
                 if result.returncode == 0:
-                    # Extract version from output if possible
-                    version = result.stdout.split('\n')[0] if result.stdout else 'installed'
-                    return True, version
+                    # Extract version from output if possible (first line only)
+                    version = result.stdout.split(b'\n', 1)[0].decode('utf-8', 'replace').rstrip()
+                    return True, version or 'installed'
             except (FileNotFoundError, subprocess.TimeoutExpired):
                 pass
         
         # Check via path (for OBS)
-        if dep.get('check_path'):
-            path = dep['check_path'].get(self.os_type)
-            if path and os.path.exists(path):
-                return True, path
+        path = dep['check_path_os']
+        if path and os.path.exists(path):
+            return True, path
         
         return False, None
     
+    @staticmethod
+    def _is_executable_file(path: str) -> Optional[bool]:
+        """
+        Check a file's header instead of running it
+        
+        Returns:
+            True for a recognised executable the user may run, False if it
+            cannot be run, None if the header is not recognised
+        """
+        if not os.path.isfile(path) or not os.access(path, os.X_OK):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(4)
+        except OSError:
+            return False
+        return True if header.startswith(EXECUTABLE_MAGIC) else None
+    
+    def _verify_executable(self, path: str, timeout: Optional[float] = None) -> bool:
+        """Header check, falling back to running '--version' when inconclusive"""
+        is_executable = self._is_executable_file(path)
+        if is_executable is not None:
+            return is_executable
+        
+        try:
+            result = subprocess.run(
+                [path, '--version'],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout or self._probe_timeout
+            )
+            return result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+    
     def check_ollama_models(self) -> Dict[str, bool]:
         """Check which Ollama models are available"""
         try:
@@ -189,46 +394,72 @@ class DependencyManager:
             pass
         return {}
     
-    def check_all(self) -> Dict[str, Dict]:
-        """Check all dependencies"""
-        results = {}
+    def check_all(self, with_version: bool = False) -> Dict[str, Dict]:
+        """
+        Check all dependencies
         
+        Args:
+            with_version: Run each executable to report its version
+                (otherwise 'version' holds the executable's path)
+        """
+        results = dict(self.iter_checks(with_version))
+        return {dep[0]: results[dep[0]] for dep in self._dep_iter}
+    
+    def iter_checks(self, with_version: bool = False) -> Iterator[Tuple[str, Dict]]:
+        """
+        Check all dependencies, yielding (dep_key, info) as each check finishes
+        
+        Args:
+            with_version: Run each executable to report its version
+        """
         # Load custom paths from config
         custom_paths = self._load_custom_paths()
         
-        for dep_key, dep_info in self.DEPENDENCIES.items():
-            custom_path = custom_paths.get(dep_key)
-            is_installed, version = self.check_dependency(dep_key, custom_path)
-            results[dep_key] = {
-                'name': dep_info['name'],
-                'description': dep_info['description'],
-                'required': dep_info['required'],
-                'installed': is_installed,
-                'version': version
+        # Each check mostly waits on a subprocess, so run them side by side
+        with ThreadPoolExecutor(max_workers=min(8, len(self._dep_iter))) as executor:
+            futures = {
+                executor.submit(self.check_dependency, dep[0], custom_paths.get(dep[0]), with_version): dep
+                for dep in self._dep_iter
             }
-        
-        return results
+            
+            for future in as_completed(futures):
+                dep_key, name, description, required = futures[future]
+                is_installed, version = future.result()
+                yield dep_key, {
+                    'name': name,
+                    'description': description,
+                    'required': required,
+                    'installed': is_installed,
+                    'version': version
+                }
     
     def get_install_command(self, dep_key: str) -> Optional[str]:
         """Get installation command for current OS"""
-        dep = self.DEPENDENCIES.get(dep_key)
+        dep = self._dep_active.get(dep_key)
         if not dep:
             return None
         
-        return dep['install'].get(self.os_type)
+        return dep['install_cmd']
     
-    def install_dependency(self, dep_key: str, auto_confirm: bool = False) -> bool:
+    def install_dependency(
+        self,
+        dep_key: str,
+        auto_confirm: bool = False,
+        wait_for_post_install: bool = False
+    ) -> bool:
         """
         Install a dependency
         
         Args:
             dep_key: Dependency key
             auto_confirm: Skip confirmation prompt
+            wait_for_post_install: Block until the post-install step exits
+                (it otherwise keeps running in the background)
             
         Returns:
             Success status
         """
-        dep = self.DEPENDENCIES.get(dep_key)
+        dep = self._dep_active.get(dep_key)
         if not dep:
             self.logger.error(f"Unknown dependency: {dep_key}")
             return False
@@ -240,7 +471,7 @@ class DependencyManager:
             return True
         
         # Get install command
-        install_cmd = self.get_install_command(dep_key)
+        install_cmd = dep['install_cmd']
         if not install_cmd:
             self.logger.error(f"No installation method for {dep['name']} on {self.os_type}")
             return False
@@ -258,53 +489,148 @@ class DependencyManager:
         try:
             self.logger.info(f"Installing {dep['name']}...")
             
-            # Handle different installation methods
-            if install_cmd.startswith('brew'):
-                result = subprocess.run(install_cmd.split(), check=True)
-            elif install_cmd.startswith('sudo'):
-                # For sudo commands, we need to run with shell
-                result = subprocess.run(install_cmd, shell=True, check=True)
-            elif install_cmd.startswith('curl') or install_cmd.startswith('git'):
-                result = subprocess.run(install_cmd, shell=True, check=True)
+            if install_cmd.startswith(self.RUNNABLE_INSTALL_PREFIXES):
+                self._run_install(install_cmd)
             else:
                 # For other commands, provide manual instructions
                 print(f"\nPlease run: {install_cmd}")
                 return False
             
-            # Post-installation steps
-            if dep.get('post_install'):
-                self.logger.info("Running post-installation steps...")
-                subprocess.run(dep['post_install'], shell=True)
-            
-            # Verify installation
-            is_installed, version = self.check_dependency(dep_key)
-            if is_installed:
-                self.logger.info(f"✓ {dep['name']} installed successfully")
-                return True
-            else:
-                self.logger.warning(f"Installation completed but {dep['name']} not detected")
-                return False
+            self.refresh()
+            return self._finish_install(dep_key, wait_for_post_install)
         
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Installation failed: {e}")
             return False
     
+    @staticmethod
+    def _run_install(install_cmd: str):
+        """Run an install command, through the shell only for pipelines and chains"""
+        if '|' in install_cmd or '&&' in install_cmd:
+            subprocess.run(install_cmd, shell=True, check=True)
+        else:
+            subprocess.run(shlex.split(install_cmd), check=True)
+    
+    def _finish_install(self, dep_key: str, wait_for_post_install: bool = False) -> bool:
+        """Start post-installation steps and verify the dependency is now present"""
+        dep = self.DEPENDENCIES[dep_key]
+        
+        # Post-installation steps (e.g. 'ollama serve', which does not exit)
+        # run alongside verification, which only needs the binary
+        post_install = None
+        if dep.get('post_install'):
+            self.logger.info("Running post-installation steps...")
+            post_install = subprocess.Popen(dep['post_install'], shell=True)
+        
+        # Verify installation
+        is_installed, _ = self._probe_dependency(dep_key, None, self.VERIFY_TIMEOUT)
+        if is_installed:
+            self.logger.info(f"✓ {dep['name']} installed successfully")
+        else:
+            self.logger.warning(f"Installation completed but {dep['name']} not detected")
+        
+        if post_install is not None:
+            if wait_for_post_install:
+                post_install.wait()
+            else:
+                self.logger.info(f"'{dep['post_install']}' continues in the background")
+        
+        return is_installed
+    
+    def install_many(
+        self,
+        dep_keys: List[str],
+        auto_confirm: bool = False,
+        wait_for_post_install: bool = False
+    ) -> Dict[str, bool]:
+        """
+        Install several dependencies, one package manager run per manager
+        
+        Dependencies installed through brew or apt-get are combined into a
+        single command; other installers run one by one via
+        install_dependency().
+        
+        Args:
+            dep_keys: Dependency keys
+            auto_confirm: Skip confirmation prompts
+            wait_for_post_install: Block until each post-install step exits
+            
+        Returns:
+            Dict mapping dependency key to success status
+        """
+        results = {}
+        # Command without package names (e.g. 'brew install --cask') -> (keys, packages)
+        batches: Dict[str, Tuple[List[str], List[str]]] = {}
+        
+        for dep_key in dep_keys:
+            install_cmd = self.get_install_command(dep_key) or ''
+            prefix = next((p for p in self.BATCH_INSTALL_PREFIXES if install_cmd.startswith(p)), None)
+            if prefix is None or self.check_dependency(dep_key)[0]:
+                results[dep_key] = self.install_dependency(dep_key, auto_confirm, wait_for_post_install)
+                continue
+            
+            args = install_cmd[len(prefix):].split()
+            options = [a for a in args if a.startswith('-')]
+            batch_cmd = ' '.join([prefix.strip()] + options)
+            keys, packages = batches.setdefault(batch_cmd, ([], []))
+            keys.append(dep_key)
+            packages.extend(a for a in args if not a.startswith('-'))
+        
+        for batch_cmd, (keys, packages) in batches.items():
+            if len(keys) == 1:
+                results[keys[0]] = self.install_dependency(keys[0], auto_confirm, wait_for_post_install)
+                continue
+            
+            install_cmd = f"{batch_cmd} {' '.join(packages)}"
+            
+            # Confirm installation
+            if not auto_confirm:
+                for dep_key in keys:
+                    dep = self.DEPENDENCIES[dep_key]
+                    print(f"\n{dep['name']}: {dep['description']}")
+                print(f"Install command: {install_cmd}")
+                response = input("Install? (y/n): ").lower().strip()
+                if response != 'y':
+                    self.logger.info("Installation cancelled")
+                    results.update({k: False for k in keys})
+                    continue
+            
+            names = ', '.join(self.DEPENDENCIES[k]['name'] for k in keys)
+            try:
+                self.logger.info(f"Installing {names}...")
+                self._run_install(install_cmd)
+                failed = False
+            except subprocess.CalledProcessError as e:
+                # Some packages of the batch may still have been installed
+                self.logger.error(f"Installation failed: {e}")
+                failed = True
+            
+            self.refresh()
+            for dep_key in keys:
+                if failed and not self.check_dependency(dep_key)[0]:
+                    results[dep_key] = False
+                    continue
+                results[dep_key] = self._finish_install(dep_key, wait_for_post_install)
+        
+        return {dep_key: results[dep_key] for dep_key in dep_keys}
+    
     def interactive_setup(self):
         """Interactive setup wizard"""
         print("\n" + "="*60)
         print("Church Media Automation System - Dependency Setup")
         print("="*60 + "\n")
         
-        results = self.check_all()
-        
-        # Show status
+        # Show status as each check finishes
         print("Dependency Status:\n")
-        for dep_key, info in results.items():
+        results = {}
+        for dep_key, info in self.iter_checks(with_version=True):
+            results[dep_key] = info
             status = "✓ Installed" if info['installed'] else "✗ Not installed"
             required = " (REQUIRED)" if info['required'] else " (optional)"
             print(f"{status:20} {info['name']:20} {info['description']}{required}")
             if info['installed'] and info['version']:
                 print(f"{'':20} → {info['version'][:60]}")
+        results = {dep[0]: results[dep[0]] for dep in self._dep_iter}
         
         print("\n" + "-"*60 + "\n")
         
@@ -314,19 +640,22 @@ class DependencyManager:
         
         if missing_required:
             print("⚠ Required dependencies are missing!\n")
-            for dep_key in missing_required:
-                self.install_dependency(dep_key, auto_confirm=False)
+            self.install_many(missing_required, auto_confirm=False)
         
         if missing_optional:
             print("\nOptional dependencies:\n")
+            chosen = []
             for dep_key in missing_optional:
                 dep = self.DEPENDENCIES[dep_key]
                 print(f"\n{dep['name']}: {dep['description']}")
                 response = input("Install? (y/n/p for provide path): ").lower().strip()
                 if response == 'y':
-                    self.install_dependency(dep_key, auto_confirm=True)
+                    chosen.append(dep_key)
                 elif response == 'p':
                     self._configure_custom_path(dep_key)
+            
+            if chosen:
+                self.install_many(chosen, auto_confirm=True)
         
         # Download whisper models if whisper.cpp is installed
         if results['whisper.cpp']['installed']:
@@ -364,17 +693,70 @@ class DependencyManager:
                 download_url = f"https://huggingface.co/ggerganov/whisper.cpp/resolve/main/{model_file}"
                 
                 try:
-                    import urllib.request
-                    urllib.request.urlretrieve(download_url, model_path)
+                    self._download_with_resume(download_url, model_path)
                     print(f"✓ Downloaded {model_file}")
                 except Exception as e:
                     print(f"✗ Download failed: {e}")
-                    print(f"Please download manually from: {download_url}")
+                    print("Run setup again to resume the download")
+                    print(f"Or download manually from: {download_url}")
+    
+    def _download_with_resume(self, url: str, dest: Path, chunk_size: int = 1 << 20):
+        """
+        Download a file in chunks, resuming a previous partial download
+        
+        Data goes to dest + '.part' and is renamed to dest once complete, so
+        an interrupted download is picked up where it stopped next time.
+        """
+        import urllib.error
+        import urllib.request
+        
+        part_path = dest.with_name(dest.name + '.part')
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header('Range', f'bytes={offset}-')
+        
+        try:
+            response = urllib.request.urlopen(request, timeout=30)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not offset:
+                raise
+            # The partial file holds the whole body only if its size is the
+            # one the server reports ("bytes */N"); otherwise start over
+            content_range = e.headers.get('Content-Range', '')
+            _, _, size = content_range.rpartition('/')
+            if content_range.startswith('bytes */') and size.isdigit() and int(size) == offset:
+                os.replace(part_path, dest)
+                return
+            part_path.unlink()
+            return self._download_with_resume(url, dest, chunk_size)
+        
+        with response:
+            if offset and response.status != 206:
+                # Server ignored the range; start over
+                offset = 0
+            length = response.headers.get('Content-Length')
+            total = offset + int(length) if length else None
+            
+            done = offset
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                while chunk := response.read(chunk_size):
+                    f.write(chunk)
+                    done += len(chunk)
+                    if total:
+                        print(f"\r  {done / 1048576:.0f} / {total / 1048576:.0f} MB "
+                              f"({done * 100 // total}%)", end='', flush=True)
+                    else:
+                        print(f"\r  {done / 1048576:.0f} MB", end='', flush=True)
+            print()
+        
+        if total and done != total:
+            raise IOError(f"Incomplete download ({done} of {total} bytes)")
+        os.replace(part_path, dest)
     
     def _configure_custom_path(self, dep_key: str):
         """Configure custom path for a dependency"""
-        import yaml
-        
         dep = self.DEPENDENCIES.get(dep_key)
         if not dep:
             return
@@ -389,42 +771,33 @@ class DependencyManager:
             print("  macOS/Linux: ~/whisper.cpp/main")
             print("  Windows: C:\\whisper.cpp\\main.exe")
         
-        path = input("\nEnter full path to executable: ").strip()
-        
-        # Validate path
-        if not os.path.exists(path):
-            print(f"✗ Path does not exist: {path}")
+        while True:
+            path = input("\nEnter full path to executable: ").strip()
+            
+            # Validate path
+            if not os.path.exists(path):
+                print(f"✗ Path does not exist: {path}")
+            # Test the executable
+            elif not self._verify_executable(path):
+                print(f"✗ Not an executable file: {path}")
+            else:
+                break
+            
             retry = input("Try again? (y/n): ").lower().strip()
-            if retry == 'y':
-                return self._configure_custom_path(dep_key)
-            return
-        
-        # Test the executable
-        try:
-            result = subprocess.run(
-                [path, '--help'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode != 0:
-                print(f"✗ Executable test failed")
+            if retry != 'y':
                 return
-        except Exception as e:
-            print(f"✗ Failed to test executable: {e}")
-            return
         
         print(f"✓ Path verified: {path}")
         
         # Update config file
-        config_path = Path("config/config.yaml")
-        if not config_path.exists():
-            print("✗ Config file not found")
-            return
+        config_path = self.CONFIG_PATH
         
         try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f) or {}
+            config = self._read_config()
+            if config is None:
+                print("✗ Config file not found")
+                return
+            config = copy.deepcopy(config)
             
             if dep_key == 'whisper.cpp':
                 if 'modules' not in config:
@@ -437,8 +810,7 @@ class DependencyManager:
                 config['modules']['subtitles']['whispercpp']['custom_path'] = path
                 config['modules']['subtitles']['whispercpp']['whisper_bin'] = path
             
-            with open(config_path, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            self._write_config(config)
             
             print(f"✓ Configuration saved to {config_path}")
             print(f"\nCustom path configured: {path}")
@@ -470,7 +842,7 @@ def main():
     
     if args.command == 'check':
         if args.dependency:
-            is_installed, version = manager.check_dependency(args.dependency)
+            is_installed, version = manager.check_dependency(args.dependency, with_version=True)
             if is_installed:
                 print(f"✓ {args.dependency} is installed: {version}")
             else: